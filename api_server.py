@@ -1,3 +1,5 @@
+import asyncio
+import json
 import os
 
 os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
@@ -6,17 +8,46 @@ os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
 
 import shutil
 import tempfile
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
 from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 from fh_core import FaceHuntCore
+from fh_download_cache import DownloadCache
+from fh_jobs import JobManager
+from fh_model_registry import ModelRegistry
+from fh_stream import SpooledUpload
+
+model_registry = ModelRegistry(
+    model_names=("Facenet",), detector_backends=("retinaface", "mtcnn")
+)
+download_cache = DownloadCache(
+    "videos",
+    max_bytes=int(os.environ.get("FACEHUNT_VIDEO_CACHE_MB", 5120)) * 1024 * 1024,
+)
+core = FaceHuntCore(model_registry=model_registry, download_cache=download_cache)
+job_manager = JobManager(max_workers=int(os.environ.get("FACEHUNT_JOB_WORKERS", 2)))
+
+# Frame memory per job; unset, each job takes a share of what is still free
+job_memory_budget = (
+    int(os.environ["FACEHUNT_JOB_MEMORY_MB"]) * 1024 * 1024
+    if os.environ.get("FACEHUNT_JOB_MEMORY_MB")
+    else None
+)
 
-app = FastAPI(title="FaceHunt App")
-core = FaceHuntCore()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    model_registry.warm_up_in_background()
+    yield
+
+
+app = FastAPI(title="FaceHunt App", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,7 +62,11 @@ api_router = APIRouter(prefix="/api")
 
 @app.get("/healthz")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy" if model_registry.ready else "loading",
+        "ready": model_registry.ready,
+        "models": model_registry.report(),
+    }
 
 
 @api_router.post("/upload-image")
@@ -95,22 +130,52 @@ async def recognize_faces(
     mode: str = Form(...),
     video_file: Optional[UploadFile] = File(None),
     video_url: Optional[str] = Form(None),
+    max_matches: Optional[int] = Form(None),
+    top_k: Optional[int] = Form(None),
+    sampling: str = Form("fixed"),
+    shot_detection: bool = Form(False),
+    prefilter: bool = Form(False),
+    tracking: bool = Form(False),
+    detection_width: Optional[int] = Form(1280),
+    start_time: Optional[str] = Form(None),
+    end_time: Optional[str] = Form(None),
+    roi: Optional[str] = Form(None),
+    stream: bool = Form(False),
 ):
     if not (video_file or video_url) or (video_file and video_url):
         raise HTTPException(
             status_code=400, detail="You must provide either video_file or video_url."
         )
+    check_search_options(max_matches, top_k, sampling, detection_width)
+    search_range = parse_search_range(start_time, end_time, roi)
 
     image_temp_path = None
     video_temp_path = None
+    video_upload = None
     try:
         image_temp_path = save_temp_file(reference_image)
-        video_source = video_url if video_url else save_temp_file(video_file)
-        if video_file:
-            video_temp_path = video_source
+        video_source = video_url
+        if video_file and SpooledUpload.supported():
+            video_upload = open_spooled_upload(video_file)
+            video_source = video_upload.path
+        elif video_file:
+            video_source = video_temp_path = save_temp_file(video_file)
 
-        result = core.execute_workflow(
-            image_path=image_temp_path, mode=mode, video_source=video_source
+        result = await run_in_threadpool(
+            core.execute_workflow,
+            image_path=image_temp_path,
+            mode=mode,
+            video_source=video_source,
+            max_matches=max_matches,
+            top_k=top_k,
+            sampling=sampling,
+            shot_detection=shot_detection,
+            prefilter=prefilter,
+            tracking=tracking,
+            detection_width=detection_width,
+            stream=stream,
+            memory_budget=job_memory_budget,
+            **search_range,
         )
 
         if not result["success"]:
@@ -135,6 +200,202 @@ async def recognize_faces(
             os.remove(image_temp_path)
         if video_temp_path and os.path.exists(video_temp_path):
             os.remove(video_temp_path)
+        if video_upload is not None:
+            video_upload.close()
+
+
+@api_router.post("/recognize-gallery")
+async def recognize_gallery(
+    reference_images: List[UploadFile] = File(...),
+    mode: str = Form(...),
+    labels: Optional[str] = Form(None),
+    video_file: Optional[UploadFile] = File(None),
+    video_url: Optional[str] = Form(None),
+    max_matches: Optional[int] = Form(None),
+    top_k: Optional[int] = Form(None),
+    sampling: str = Form("fixed"),
+    shot_detection: bool = Form(False),
+    prefilter: bool = Form(False),
+    tracking: bool = Form(False),
+    detection_width: Optional[int] = Form(1280),
+    start_time: Optional[str] = Form(None),
+    end_time: Optional[str] = Form(None),
+    roi: Optional[str] = Form(None),
+):
+    if not (video_file or video_url) or (video_file and video_url):
+        raise HTTPException(
+            status_code=400, detail="You must provide either video_file or video_url."
+        )
+    check_search_options(max_matches, top_k, sampling, detection_width)
+    search_range = parse_search_range(start_time, end_time, roi)
+
+    if labels:
+        label_list = [label.strip() for label in labels.split(",")]
+    else:
+        label_list = [
+            os.path.splitext(image.filename or f"reference_{i + 1}")[0]
+            for i, image in enumerate(reference_images)
+        ]
+    if len(label_list) != len(reference_images):
+        raise HTTPException(
+            status_code=400, detail="You must provide one label per reference image."
+        )
+
+    image_temp_paths = []
+    video_temp_path = None
+    video_upload = None
+    try:
+        for image in reference_images:
+            image_temp_paths.append(save_temp_file(image))
+        video_source = video_url
+        if video_file and SpooledUpload.supported():
+            video_upload = open_spooled_upload(video_file)
+            video_source = video_upload.path
+        elif video_file:
+            video_source = video_temp_path = save_temp_file(video_file)
+
+        result = await run_in_threadpool(
+            core.execute_workflow,
+            image_path=image_temp_paths,
+            mode=mode,
+            video_source=video_source,
+            labels=label_list,
+            max_matches=max_matches,
+            top_k=top_k,
+            sampling=sampling,
+            shot_detection=shot_detection,
+            prefilter=prefilter,
+            tracking=tracking,
+            detection_width=detection_width,
+            memory_budget=job_memory_budget,
+            **search_range,
+        )
+
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        for temp_path in image_temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if video_temp_path and os.path.exists(video_temp_path):
+            os.remove(video_temp_path)
+        if video_upload is not None:
+            video_upload.close()
+
+
+@api_router.post("/jobs")
+async def submit_job(
+    reference_image: UploadFile = File(...),
+    mode: str = Form(...),
+    video_file: Optional[UploadFile] = File(None),
+    video_url: Optional[str] = Form(None),
+    max_matches: Optional[int] = Form(None),
+    top_k: Optional[int] = Form(None),
+    sampling: str = Form("fixed"),
+    shot_detection: bool = Form(False),
+    prefilter: bool = Form(False),
+    tracking: bool = Form(False),
+    detection_width: Optional[int] = Form(1280),
+    start_time: Optional[str] = Form(None),
+    end_time: Optional[str] = Form(None),
+    roi: Optional[str] = Form(None),
+    stream: bool = Form(False),
+):
+    if not (video_file or video_url) or (video_file and video_url):
+        raise HTTPException(
+            status_code=400, detail="You must provide either video_file or video_url."
+        )
+    check_search_options(max_matches, top_k, sampling, detection_width)
+    search_range = parse_search_range(start_time, end_time, roi)
+
+    temp_paths = [save_temp_file(reference_image)]
+    video_source = video_url
+    video_upload = None
+    if video_file and SpooledUpload.supported():
+        video_upload = open_spooled_upload(video_file)
+        video_source = video_upload.path
+    elif video_file:
+        video_source = save_temp_file(video_file)
+        temp_paths.append(video_source)
+
+    def work(job):
+        return core.execute_workflow(
+            image_path=temp_paths[0],
+            mode=mode,
+            video_source=video_source,
+            progress_callback=job.update_progress,
+            cancel_event=job.cancel_event,
+            max_matches=max_matches,
+            top_k=top_k,
+            sampling=sampling,
+            shot_detection=shot_detection,
+            prefilter=prefilter,
+            tracking=tracking,
+            detection_width=detection_width,
+            stream=stream,
+            memory_budget=job_memory_budget,
+            **search_range,
+        )
+
+    def cleanup():
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        if video_upload is not None:
+            video_upload.close()
+
+    job = job_manager.submit(work, cleanup=cleanup)
+    return {"job_id": job.id, "status": job.status}
+
+
+@api_router.get("/jobs/{job_id}")
+async def job_status(job_id: str, include_matches: bool = True):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_dict(include_matches=include_matches)
+
+
+@api_router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream a job's matches and progress as Server-Sent Events."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def event_stream():
+        position = 0
+        while True:
+            finished = job.finished
+            events = job.events_since(position)
+            position += len(events)
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+            if finished:
+                done = job.to_dict(include_matches=True)
+                yield f"event: done\ndata: {json.dumps(done)}\n\n"
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_dict(include_matches=False)
 
 
 app.include_router(api_router)
@@ -158,6 +419,33 @@ def save_temp_file(file: UploadFile) -> str:
         file.file.close()
 
 
+def open_spooled_upload(file: UploadFile) -> SpooledUpload:
+    # The upload is already on disk; keep its descriptor past the request,
+    # which closes it, instead of copying it to a named temporary file
+    try:
+        return SpooledUpload(file.file, os.path.splitext(file.filename or "")[1])
+    finally:
+        file.file.close()
+
+
+def check_search_options(max_matches, top_k, sampling, detection_width):
+    try:
+        FaceHuntCore.check_search_options(max_matches, top_k, sampling, detection_width)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def parse_search_range(start_time, end_time, roi):
+    try:
+        return {
+            "start_time": FaceHuntCore.parse_time(start_time),
+            "end_time": FaceHuntCore.parse_time(end_time),
+            "roi": FaceHuntCore.parse_roi(roi),
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 7860))
     print("🚀 Starting FaceHunt Server (API + Frontend)...")
@@ -0,0 +1,236 @@
+from fh_batch_planner import BatchPlanner
+from fh_frame_extractor import VideoFrameExtractor
+
+
+def candidate_windows(candidate_frames, coarse_interval, start_frame=0, end_frame=None):
+    """
+    Time windows to re-sample densely around coarse candidates.
+
+    An appearance seen at a coarse sample can start right after the previous
+    sample and end right before the next one, so each window spans one coarse
+    interval on either side. Overlapping windows are merged.
+
+    Args:
+        candidate_frames: Frame indices of coarse samples that matched
+        coarse_interval: Coarse sampling interval in frames
+        start_frame: Start of the searched range
+        end_frame: End of the searched range, exclusive (None if unknown)
+
+    Returns:
+        list: (start_frame, end_frame) tuples in frame order, end exclusive
+    """
+    windows = []
+    for frame_idx in sorted(set(candidate_frames)):
+        start = max(start_frame, frame_idx - coarse_interval + 1)
+        end = frame_idx + coarse_interval
+        if end_frame:
+            end = min(end, end_frame)
+
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def _recognize_range(
+    recognizer,
+    video_path,
+    frame_interval,
+    start_frame=0,
+    end_frame=None,
+    queue_depth=2,
+    shot_detection=False,
+    roi=None,
+    frame_offset=0,
+    memory_budget=None,
+    **find_kwargs,
+):
+    """
+    Extract one range of the video at an interval and recognize it.
+
+    Args:
+        memory_budget: Bytes of decoded frames the extractor may buffer
+
+    Returns:
+        tuple: (matches, sampled_frames)
+    """
+    extractor = VideoFrameExtractor(
+        video_path, start_frame, end_frame, frame_offset=frame_offset
+    )
+    success, msg = extractor.open_video()
+    if not success:
+        raise RuntimeError(msg)
+
+    extractor.frame_interval = frame_interval
+    extractor.shot_detection = shot_detection
+    extractor.roi = roi
+    batch_planner = BatchPlanner(memory_budget=memory_budget, tune=True)
+    extractor.batch_planner = batch_planner
+    success, frame_generator_or_error = extractor.process_video(
+        pipelined=True, queue_depth=queue_depth
+    )
+    if not success:
+        raise RuntimeError(frame_generator_or_error)
+
+    matches = recognizer.find_matches(
+        frame_generator_or_error,
+        fps=extractor.fps,
+        processable_frames=extractor.total_processable_frames,
+        batch_planner=batch_planner,
+        **find_kwargs,
+    )
+    return matches, extractor.total_processable_frames
+
+
+def find_matches_adaptive(
+    recognizer,
+    video_path,
+    coarse_interval,
+    fine_interval,
+    start_frame=0,
+    end_frame=None,
+    roi=None,
+    frame_offset=0,
+    threshold=0.35,
+    candidate_threshold=0.45,
+    queue_depth=2,
+    progress_callback=None,
+    cancel_event=None,
+    max_matches=None,
+    top_k=None,
+    shot_detection=False,
+    tracking=False,
+    memory_budget=None,
+):
+    """
+    Find matches with coarse-to-fine temporal sampling.
+
+    A cheap coarse pass samples the video sparsely with a permissive
+    candidate threshold. Only the windows around candidate frames are then
+    re-sampled at the fine interval with the real threshold, which refines
+    where each appearance starts and ends. Stretches without the person are
+    never sampled densely.
+
+    Args:
+        recognizer: FaceRecognizer holding the reference embeddings
+        video_path: Path to a local video file
+        coarse_interval: Sampling interval of the coarse pass, in frames
+        fine_interval: Sampling interval inside candidate windows, in frames
+        start_frame: Frame where the range to search starts
+        end_frame: Frame where the range ends, exclusive (None or 0 for the
+                   end of the video)
+        roi: (x, y, w, h) frame region to search, as fractions
+        frame_offset: Frame of the full video where the file starts, for a
+                      downloaded section
+        threshold: Cosine distance threshold of the final matches
+        candidate_threshold: Looser threshold marking coarse candidates
+        queue_depth: Decoded batches buffered ahead of recognition
+        progress_callback: Optional callable(processed, processable_frames,
+                           matches) invoked after every batch
+        cancel_event: Optional threading.Event; when set, recognition stops
+                      before the next batch
+        max_matches: Stop after the first N matches
+        top_k: Keep only the k closest matches, returned closest first
+        shot_detection: Analyze only representative frames of each shot
+        tracking: Reuse embeddings of faces tracked across samples
+        memory_budget: Bytes of decoded frames each pass may buffer; passes
+                       run one after another (None for a share of the
+                       available memory)
+
+    Returns:
+        list: Same format as FaceRecognizer.find_matches
+
+    Raises:
+        RecognitionCancelled: If cancel_event is set during recognition
+    """
+    print(
+        f"Adaptive sampling: coarse pass every {coarse_interval} frames, "
+        f"refining every {fine_interval} frames"
+    )
+
+    def coarse_progress(processed, processable_frames, candidates):
+        if progress_callback:
+            progress_callback(processed, processable_frames, [])
+
+    candidates, coarse_frames = _recognize_range(
+        recognizer,
+        video_path,
+        coarse_interval,
+        start_frame,
+        end_frame or None,
+        queue_depth=queue_depth,
+        shot_detection=shot_detection,
+        roi=roi,
+        frame_offset=frame_offset,
+        memory_budget=memory_budget,
+        threshold=(
+            candidate_threshold
+            if threshold is None
+            else max(threshold, candidate_threshold)
+        ),
+        progress_callback=coarse_progress,
+        cancel_event=cancel_event,
+        tracking=tracking,
+    )
+
+    windows = candidate_windows(
+        [match["frame_index"] for match in candidates],
+        coarse_interval,
+        start_frame,
+        end_frame,
+    )
+    fine_frames = sum(
+        len(range(-(-start // fine_interval) * fine_interval, end, fine_interval))
+        for start, end in windows
+    )
+    print(
+        f"Coarse pass: {len(candidates)} candidates, refining {len(windows)} "
+        f"windows ({fine_frames} frames)"
+    )
+
+    matches = []
+    processed = coarse_frames
+    processable_frames = coarse_frames + fine_frames
+
+    for start, end in windows:
+        if max_matches is not None and len(matches) >= max_matches:
+            break
+
+        def fine_progress(window_processed, window_total, window_matches):
+            if progress_callback:
+                progress_callback(
+                    processed + window_processed,
+                    processable_frames,
+                    matches + window_matches,
+                )
+
+        window_matches, window_frames = _recognize_range(
+            recognizer,
+            video_path,
+            fine_interval,
+            start,
+            end,
+            queue_depth=queue_depth,
+            shot_detection=shot_detection,
+            roi=roi,
+            frame_offset=frame_offset,
+            memory_budget=memory_budget,
+            threshold=threshold,
+            progress_callback=fine_progress,
+            cancel_event=cancel_event,
+            max_matches=None if max_matches is None else max_matches - len(matches),
+            top_k=top_k,
+            tracking=tracking,
+        )
+        matches.extend(window_matches)
+        processed += window_frames
+
+    if top_k is not None:
+        matches = sorted(matches, key=lambda match: match["distance"])[:top_k]
+
+    print(
+        f"Adaptive sampling complete: {len(matches)} matches, "
+        f"{processed} frames sampled"
+    )
+    return matches
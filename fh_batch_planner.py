@@ -0,0 +1,191 @@
+import threading
+
+# Frame memory assumed when neither cgroup nor /proc/meminfo can be read
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# cgroup v2 and v1 files holding the container's memory limit and usage
+CGROUP_MEMORY_FILES = (
+    ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+    (
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+        "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+    ),
+)
+
+
+def _read_int(path):
+    """Integer in a sysfs/procfs file, or None if missing or 'max'."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def available_memory():
+    """
+    Memory this process can still use, in bytes.
+
+    Takes the lower of the host's MemAvailable and the headroom left under
+    the container's cgroup limit, so jobs in memory-limited containers are
+    sized against the limit rather than the host's RAM.
+
+    Returns:
+        int or None: Available bytes, None if unknown (e.g. not on Linux)
+    """
+    candidates = []
+
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except (OSError, ValueError, IndexError):
+        pass
+
+    for limit_path, usage_path in CGROUP_MEMORY_FILES:
+        limit = _read_int(limit_path)
+        usage = _read_int(usage_path)
+        # cgroup v1 reports "unlimited" as a huge page-aligned number
+        if limit is not None and usage is not None and limit < 1 << 60:
+            candidates.append(max(0, limit - usage))
+            break
+
+    return min(candidates) if candidates else None
+
+
+class BatchPlanner:
+    """
+    Sizes frame batches from memory and measured recognition throughput.
+
+    The memory budget caps how many frames fit in the extractor's buffer
+    ring. Within that cap, tuning starts with small batches and doubles the
+    size while frames per second keep improving, then settles on the best
+    size measured. Larger batches let FaceNet run on more faces per call but
+    also hold more frames in memory and delay progress updates.
+    """
+
+    def __init__(
+        self,
+        memory_budget=None,
+        memory_fraction=0.25,
+        max_batch=100,
+        min_batch=4,
+        tune=False,
+        batches_per_step=2,
+        min_gain=0.05,
+    ):
+        """
+        Args:
+            memory_budget: Bytes of frame buffers the job may use. None takes
+                           memory_fraction of available_memory()
+            memory_fraction: Share of the available memory used when
+                             memory_budget is None. Memory taken by jobs
+                             already running is not available, so concurrent
+                             jobs get smaller budgets.
+            max_batch: Largest batch, in frames
+            min_batch: Batch size tuning starts from
+            tune: Adjust the batch size to the throughput reported with
+                  record(); when False, batches use the whole budget
+            batches_per_step: Full batches measured at each size
+            min_gain: Relative speedup needed to keep doubling
+        """
+        self.memory_budget = memory_budget
+        self.memory_fraction = memory_fraction
+        self.max_batch = max_batch
+        self.min_batch = min_batch
+        self.tune = tune
+        self.batches_per_step = batches_per_step
+        self.min_gain = min_gain
+
+        self.capacity = max_batch
+        self.batch_size = max_batch
+        self.tuning = False
+        self._best_size = None
+        self._best_rate = 0.0
+        self._samples = []
+        self._lock = threading.Lock()
+
+    def budget(self):
+        """
+        Bytes available for frame buffers.
+
+        Returns:
+            int: memory_budget, or a share of the available memory
+        """
+        if self.memory_budget:
+            return int(self.memory_budget)
+        available = available_memory()
+        if available is None:
+            return DEFAULT_MEMORY_BUDGET
+        return int(available * self.memory_fraction)
+
+    def plan(self, frame_shape, slot_count):
+        """
+        Size batches for frames of a given shape.
+
+        Args:
+            frame_shape: Shape of one decoded RGB frame
+            slot_count: Batches alive at the same time (buffer ring slots)
+
+        Returns:
+            int: Largest batch that fits the budget, at least 1 frame
+        """
+        frame_bytes = 1
+        for dimension in frame_shape:
+            frame_bytes *= int(dimension)
+        budget = self.budget()
+        fitting = budget // (slot_count * frame_bytes)
+
+        with self._lock:
+            self.capacity = max(1, min(self.max_batch, fitting))
+            self.tuning = self.tune and self.capacity > self.min_batch
+            self.batch_size = (
+                min(self.capacity, self.min_batch) if self.tuning else self.capacity
+            )
+            self._best_size = None
+            self._best_rate = 0.0
+            self._samples = []
+
+        print(
+            f"[Batch planner] Budget {budget // (1024 * 1024)} MB, "
+            f"up to {self.capacity} frames per batch "
+            f"({frame_bytes * self.capacity * slot_count // (1024 * 1024)} MB "
+            f"in {slot_count} buffers)"
+        )
+        return self.capacity
+
+    def record(self, frame_count, seconds):
+        """
+        Report how long a batch took to recognize.
+
+        Only full batches of the current size count, since batches already
+        queued at an earlier size do not say anything about the new one.
+
+        Args:
+            frame_count: Frames in the batch
+            seconds: Recognition time of the batch
+        """
+        with self._lock:
+            if not self.tuning or frame_count != self.batch_size or seconds <= 0:
+                return
+            self._samples.append(frame_count / seconds)
+            if len(self._samples) < self.batches_per_step:
+                return
+
+            rate = sum(self._samples) / len(self._samples)
+            self._samples = []
+            if rate > self._best_rate * (1 + self.min_gain):
+                self._best_rate = rate
+                self._best_size = self.batch_size
+                if self.batch_size < self.capacity:
+                    self.batch_size = min(self.capacity, self.batch_size * 2)
+                    return
+
+            self.batch_size = self._best_size
+            self.tuning = False
+            print(
+                f"[Batch planner] Settled on {self.batch_size} frames per batch "
+                f"({self._best_rate:.1f} frames/s)"
+            )
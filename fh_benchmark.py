@@ -0,0 +1,109 @@
+import os
+
+os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+os.environ["TF_ENABLE_ONEDNN_OPTS"] = "0"
+
+import argparse
+import time
+from fh_core import FaceHuntCore
+from fh_face_recognizer import FaceRecognizer
+from fh_frame_extractor import VideoFrameExtractor
+
+
+def load_batches(video_path, max_frames, batch_size):
+    """
+    Decode sampled frames up front so only recognition is timed.
+
+    Args:
+        video_path: Path to video file
+        max_frames: Maximum number of sampled frames to keep
+        batch_size: Frames per batch handed to the recognizer
+
+    Returns:
+        tuple: (batches: list, fps: float)
+    """
+    extractor = VideoFrameExtractor(video_path)
+    success, msg = extractor.open_video()
+    if not success:
+        raise RuntimeError(msg)
+    extractor.determine_interval()
+
+    frames = []
+    for batch in extractor.extract_frames():
+        frames.extend((frame.copy(), frame_idx) for frame, frame_idx in batch)
+        if len(frames) >= max_frames:
+            break
+    frames = frames[:max_frames]
+
+    batches = [
+        frames[start : start + batch_size]
+        for start in range(0, len(frames), batch_size)
+    ]
+    return batches, extractor.fps
+
+
+def run_benchmark(recognizer, batches, fps, batched):
+    """
+    Time FaceRecognizer.find_matches over preloaded batches.
+
+    Returns:
+        tuple: (matches: list, frames_per_second: float)
+    """
+    frame_count = sum(len(batch) for batch in batches)
+    start = time.perf_counter()
+    matches = recognizer.find_matches(iter(batches), fps=fps, batched=batched)
+    elapsed = time.perf_counter() - start
+    return matches, frame_count / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare per-frame and batched FaceRecognizer throughput."
+    )
+    parser.add_argument("image", help="Reference image with a single face")
+    parser.add_argument("video", help="Local video file")
+    parser.add_argument("--detector", default="mtcnn")
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--detection-width",
+        type=int,
+        default=None,
+        help="Detect faces on frames downscaled to this width",
+    )
+    args = parser.parse_args()
+
+    success, embedding, message = FaceHuntCore().validate_image_file(args.image)
+    if not success:
+        raise SystemExit(message)
+
+    batches, fps = load_batches(args.video, args.max_frames, args.batch_size)
+    recognizer = FaceRecognizer(
+        embedding,
+        detector_backend=args.detector,
+        detection_width=args.detection_width,
+    )
+
+    # Warm up model and detector so neither run pays the build cost
+    recognizer.find_matches(iter([batches[0][:1]]), fps=fps)
+
+    per_frame_matches, per_frame_fps = run_benchmark(
+        recognizer, batches, fps, batched=False
+    )
+    batched_matches, batched_fps = run_benchmark(recognizer, batches, fps, batched=True)
+
+    print("=" * 60)
+    print(f"Frames: {sum(len(batch) for batch in batches)} | Detector: {args.detector}")
+    print(f"Per-frame: {per_frame_fps:.2f} frames/sec")
+    print(f"Batched:   {batched_fps:.2f} frames/sec")
+    if per_frame_fps > 0:
+        print(f"Speedup:   {batched_fps / per_frame_fps:.2f}x")
+    same = [m["frame_index"] for m in per_frame_matches] == [
+        m["frame_index"] for m in batched_matches
+    ]
+    print(f"Matches identical: {same}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import math
 import os
 import cv2
 import yt_dlp
@@ -6,14 +7,42 @@ import shutil
 import numpy as np
 from deepface import DeepFace
 import traceback
+from fh_adaptive import find_matches_adaptive
+from fh_batch_planner import BatchPlanner
 from fh_downloader import VideoDownloader
-from fh_face_recognizer import FaceRecognizer
-from fh_frame_extractor import VideoFrameExtractor
+from fh_embedding_cache import EmbeddingCache
+from fh_face_index import FaceIndex
+from fh_face_recognizer import FaceRecognizer, RecognitionCancelled
+from fh_frame_extractor import ROI_PRESETS, VideoFrameExtractor
+from fh_metadata import MetadataCache, video_properties
+from fh_parallel import find_matches_parallel
+from fh_prefilter import HaarPrefilter
+from fh_stream import is_pipe
+from fh_tracker import build_appearances
 
 
 class FaceHuntCore:
     """Handles core validation and processing logic for FaceHunt application."""
 
+    def __init__(self, model_registry=None, download_cache=None, metadata=None):
+        """
+        Initialize the core.
+
+        Args:
+            model_registry (ModelRegistry, optional): Registry of preloaded
+                models. When given, recognition reuses its warm FaceNet
+                instance instead of building one per job.
+            download_cache (DownloadCache, optional): Keep downloaded YouTube
+                videos for later requests instead of deleting them after
+                each run.
+            metadata (MetadataCache, optional): Shared yt-dlp metadata, so a
+                YouTube video's info is extracted once for validation,
+                download and extraction. A private cache is used if omitted.
+        """
+        self.model_registry = model_registry
+        self.download_cache = download_cache
+        self.metadata = metadata if metadata is not None else MetadataCache()
+
     def validate_image_file(self, file_path):
         """
         Validates the reference image and extracts facial embedding.
@@ -32,6 +61,126 @@ class FaceHuntCore:
 
         return self._extract_face_embedding(file_path)
 
+    def validate_gallery(self, image_paths, labels=None):
+        """
+        Validates several reference images and collects their embeddings.
+
+        Each image must contain exactly one face. Labels default to the image
+        file names without extension.
+
+        Returns:
+            tuple: (success: bool, embeddings: list or None,
+                    labels: list or None, message: str)
+        """
+        if not image_paths:
+            return False, None, None, "Please select at least one image file."
+
+        if labels is None:
+            labels = [
+                os.path.splitext(os.path.basename(path))[0] for path in image_paths
+            ]
+
+        if len(labels) != len(image_paths):
+            return False, None, None, "Please provide one label per reference image."
+
+        embeddings = []
+        for path, label in zip(image_paths, labels):
+            success, embedding, message = self.validate_image_file(path)
+            if not success:
+                return False, None, None, f"{label}: {message}"
+            embeddings.append(embedding)
+
+        return (
+            True,
+            embeddings,
+            list(labels),
+            f"Valid gallery with {len(embeddings)} reference faces",
+        )
+
+    @staticmethod
+    def parse_time(value):
+        """
+        Parse a time given as seconds, "MM:SS" or "HH:MM:SS".
+
+        Args:
+            value: Time as number or string. None or "" mean no limit.
+
+        Returns:
+            float or None: Seconds
+
+        Raises:
+            ValueError: If the value is not a valid time
+        """
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        if isinstance(value, (int, float)):
+            parts = [float(value)]
+        else:
+            parts = [float(part) for part in value.strip().split(":")]
+        if len(parts) > 3:
+            raise ValueError(f"Invalid time: {value}")
+
+        seconds = 0.0
+        for position, part in enumerate(parts):
+            # Minutes and seconds after a larger unit must stay below 60
+            if not math.isfinite(part) or part < 0 or (position and part >= 60):
+                raise ValueError(f"Invalid time: {value}")
+            seconds = seconds * 60 + part
+        return seconds
+
+    @staticmethod
+    def check_search_options(
+        max_matches=None, top_k=None, sampling="fixed", detection_width=None
+    ):
+        """
+        Validate the search options of execute_workflow.
+
+        Raises:
+            ValueError: If an option is out of range or max_matches and top_k
+                        are both given
+        """
+        if max_matches is not None and top_k is not None:
+            raise ValueError("Use either max_matches or top_k, not both.")
+        for name, value in (("max_matches", max_matches), ("top_k", top_k)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1.")
+        if detection_width is not None and detection_width < 0:
+            raise ValueError(
+                "detection_width cannot be negative (0 detects at full resolution)."
+            )
+        if sampling not in ("fixed", "adaptive"):
+            raise ValueError("sampling must be 'fixed' or 'adaptive'.")
+
+    @staticmethod
+    def parse_roi(value):
+        """
+        Parse a region of interest.
+
+        Args:
+            value: Preset name ("left", "right", "top", "bottom", "center",
+                   "full") or "x,y,w,h" with fractions of the frame size.
+                   None or "" mean the whole frame.
+
+        Returns:
+            tuple or None: (x, y, w, h) fractions, or None for the whole frame
+
+        Raises:
+            ValueError: If the value is not a valid region
+        """
+        if value is None or not value.strip():
+            return None
+        value = value.strip().lower()
+        if value in ROI_PRESETS:
+            return ROI_PRESETS[value]
+
+        try:
+            x, y, w, h = (float(part) for part in value.split(","))
+        except ValueError:
+            raise ValueError(f"Invalid region: {value}")
+        if x < 0 or y < 0 or w <= 0 or h <= 0 or x + w > 1 or y + h > 1:
+            raise ValueError("Region must be x,y,w,h fractions inside the frame")
+        return x, y, w, h
+
     @staticmethod
     def _create_temp_image_copy(file_path):
         """
@@ -145,6 +294,10 @@ class FaceHuntCore:
         if not source:
             return False, None, "Video source cannot be empty."
 
+        if is_pipe(source):
+            # Opening the pipe here would consume the start of the video
+            return True, "local", "Streamed video upload."
+
         if os.path.exists(source):
             cap = cv2.VideoCapture(source)
             if cap.isOpened():
@@ -154,10 +307,7 @@ class FaceHuntCore:
                 return False, None, "Invalid or unsupported video format."
 
         try:
-            with yt_dlp.YoutubeDL(
-                {"quiet": True, "noplaylist": True, "extract_flat": False}
-            ) as ydl:
-                info = ydl.extract_info(source, download=False)
+            info = self.metadata.get(source)
 
             if (
                 not info
@@ -193,7 +343,31 @@ class FaceHuntCore:
         except Exception as e:
             return False, None, f"An unexpected error occurred: {e}"
 
-    def execute_workflow(self, image_path, mode, video_source):
+    def execute_workflow(
+        self,
+        image_path,
+        mode,
+        video_source,
+        labels=None,
+        queue_depth=2,
+        workers=1,
+        cache_dir=None,
+        index_dir=None,
+        progress_callback=None,
+        cancel_event=None,
+        max_matches=None,
+        top_k=None,
+        sampling="fixed",
+        shot_detection=False,
+        prefilter=False,
+        tracking=False,
+        detection_width=1280,
+        start_time=None,
+        end_time=None,
+        roi=None,
+        stream=False,
+        memory_budget=None,
+    ):
         """
         Executes the complete FaceHunt workflow in a headless environment.
 
@@ -203,22 +377,103 @@ class FaceHuntCore:
         from an API or a command-line interface, containing no GUI dependencies.
 
         Args:
-            image_path (str): The file path to the reference image.
+            image_path (str | list): The file path to the reference image, or a
+                                     list of paths to search for several people
+                                     in a single pass (gallery mode).
             mode (str): The processing mode, either "balanced" or "precision".
             video_source (str): The video source, which can be a local file path
                                 or a YouTube URL.
+            labels (list, optional): Identity name for each gallery image.
+                                     Matches are tagged with a 'label' key.
+            queue_depth (int): Decoded frame batches buffered ahead of face
+                               recognition. Bounds extraction memory.
+            workers (int): Worker processes. Above 1, the video is split into
+                           time segments recognized in parallel, each worker
+                           loading its models once.
+            cache_dir (str, optional): Directory of the embedding cache. Every
+                                       detected face is stored on the first
+                                       run; later runs on the same video skip
+                                       decoding and inference entirely.
+            index_dir (str, optional): Face index the video's cached faces are
+                                       added to, for library-wide queries with
+                                       query_index. Requires cache_dir.
+            progress_callback (callable, optional): Called as
+                progress_callback(processed, processable_frames, matches)
+                while frames are recognized.
+            cancel_event (threading.Event, optional): Set it to stop the job.
+            max_matches (int, optional): Stop extraction and inference once
+                                         this many matches are found (e.g. 1
+                                         for "is this person in the video").
+                                         Runs sequentially and bypasses the
+                                         cache writer, since the scan is partial.
+            top_k (int, optional): Return only the k closest matches, closest
+                                   first, each with its 'distance'.
+            sampling (str): "fixed" samples one frame per second. "adaptive"
+                            runs a sparse coarse pass, then re-samples densely
+                            only around candidate matches. Adaptive runs are
+                            sequential and do not fill the embedding cache.
+            shot_detection (bool): Detect scene changes and analyze only a few
+                                   representative frames per shot. Matches on
+                                   a representative are spread to every sample
+                                   of its shot. Much less detector work on
+                                   static footage (talk shows, lectures).
+            prefilter (bool): Run a cheap Haar cascade check first and send
+                              only frames that may contain a face to the
+                              MTCNN/RetinaFace detector.
+            tracking (bool): Follow faces between samples by box overlap and
+                             run FaceNet only for new tracks or when a
+                             track's overlap drops.
+            detection_width (int, optional): Run the face detector on frames
+                                             downscaled to this width and
+                                             crop faces from the original
+                                             frame. None or 0 detects at
+                                             full resolution.
+            start_time (float, optional): Seconds where the search starts.
+                                          Extraction seeks straight there.
+            end_time (float, optional): Seconds where the search ends.
+            roi (tuple, optional): (x, y, w, h) region of the frame to search,
+                                   as fractions of the frame size (see
+                                   parse_roi). Frames are cropped before
+                                   detection.
+            stream (bool): Decode a YouTube video from its media URL while it
+                           downloads instead of saving it to videos/ first.
+                           A named pipe video_source (see
+                           fh_stream.UploadStream) is always streamed; it is
+                           read once, sequentially and without the cache.
+            memory_budget (int, optional): Bytes of decoded frames this job
+                                           may hold. None takes a share of
+                                           the memory still available to the
+                                           container (see BatchPlanner). The
+                                           batch size is then tuned to the
+                                           measured recognition throughput.
 
         Returns:
             dict: A dictionary containing the results of the process.
                   {
                       "success": bool,
                       "message": str,
-                      "matches": list | None
+                      "matches": list | None,
+                      "appearances": list (on success; start and end of
+                                     each continuous appearance)
                   }
         """
         downloaded_video_path = None
+        downloader = None
         try:
-            success, embedding, message = self.validate_image_file(image_path)
+            try:
+                self.check_search_options(max_matches, top_k, sampling, detection_width)
+            except ValueError as e:
+                return {"success": False, "message": str(e), "matches": None}
+            # 0 turns downscaled detection off, like None
+            detection_width = detection_width or None
+
+            if isinstance(image_path, (list, tuple)):
+                success, embedding, labels, message = self.validate_gallery(
+                    image_path, labels
+                )
+            else:
+                success, embedding, message = self.validate_image_file(image_path)
+                labels = None
             if not success:
                 return {"success": False, "message": message, "matches": None}
 
@@ -227,14 +482,27 @@ class FaceHuntCore:
                 return {"success": False, "message": message, "matches": None}
 
             if source_type == "youtube":
+                downloader = VideoDownloader(
+                    video_source, cache=self.download_cache, metadata=self.metadata
+                )
+
+            if source_type == "youtube" and stream:
+                video_path = downloader.stream_url()
+                if video_path is None:
+                    return {
+                        "success": False,
+                        "message": "Could not stream the YouTube video.",
+                        "matches": None,
+                    }
+            elif source_type == "youtube":
                 print(f"Starting download from: {video_source}")
-                downloader = VideoDownloader(video_source)
-                video_path = downloader.download()
+                video_path = downloader.download(start_time, end_time)
 
                 if video_path is None:
+                    reason = f": {downloader.error}" if downloader.error else "."
                     return {
                         "success": False,
-                        "message": "Could not download the YouTube video.",
+                        "message": f"Could not download the YouTube video{reason}",
                         "matches": None,
                     }
 
@@ -242,37 +510,213 @@ class FaceHuntCore:
             else:
                 video_path = video_source
 
-            extractor = VideoFrameExtractor(video_path)
+            source_metadata = None
+            section = None
+            if downloader is not None and downloader.info is not None:
+                source_metadata = video_properties(downloader.info)
+                section = downloader.section
+                if section is not None:
+                    source_metadata["duration"] = section[1] - section[0]
+            extractor = VideoFrameExtractor(video_path, metadata=source_metadata)
             success, msg = extractor.open_video()
             if not success:
                 return {"success": False, "message": msg, "matches": None}
+            if section is not None:
+                # The file holds only the searched section; keep frame
+                # indices and timestamps relative to the full video
+                extractor.set_frame_offset(int(round(section[0] * extractor.fps)))
 
-            processing_mode = "High Precision" if mode == "precision" else "Balanced"
-            extractor.determine_interval(processing_mode)
-
-            success, frame_generator_or_error = extractor.process_video()
+            success, msg = extractor.set_time_range(start_time, end_time)
             if not success:
-                return {
-                    "success": False,
-                    "message": frame_generator_or_error,
-                    "matches": None,
-                }
+                extractor.release_video()
+                return {"success": False, "message": msg, "matches": None}
+            extractor.roi = roi
+            restricted = (
+                start_time is not None or end_time is not None or roi is not None
+            )
 
-            frame_generator = frame_generator_or_error
+            processing_mode = "High Precision" if mode == "precision" else "Balanced"
+            extractor.determine_interval(processing_mode)
+            extractor.shot_detection = shot_detection
 
             detector = "retinaface" if mode == "precision" else "mtcnn"
-            recognizer = FaceRecognizer(embedding, detector_backend=detector)
-            matches = recognizer.find_matches(
-                frame_generator,
-                threshold=0.35,
-                fps=extractor.fps,
-                processable_frames=extractor.total_processable_frames,
+            model = None
+            if self.model_registry is not None:
+                model = self.model_registry.get_model("Facenet")
+            recognizer = FaceRecognizer(
+                embedding,
+                detector_backend=detector,
+                labels=labels,
+                model=model,
+                prefilter=HaarPrefilter() if prefilter else None,
+                detection_width=detection_width,
             )
 
+            # A pipe can be read only once, by a single sequential pass
+            replayable = not is_pipe(video_path)
+            if not replayable and sampling == "adaptive":
+                print("Streamed upload: adaptive sampling unavailable, using fixed")
+                sampling = "fixed"
+
+            sample_interval = extractor.frame_interval
+            cache = None
+            cached = None
+            if cache_dir and os.path.isfile(video_path):
+                cache = EmbeddingCache(cache_dir)
+                cache_key = cache.key(
+                    cache.hash_video(video_path),
+                    extractor.frame_interval,
+                    detector,
+                    shot_detection=shot_detection,
+                    prefilter=prefilter,
+                    detection_width=detection_width,
+                    tracking=tracking,
+                )
+                cached = cache.load(cache_key)
+
+            if cached is not None:
+                print(f"Embedding cache hit: {cached.path}")
+                extractor.release_video()
+                searched = cached
+                if restricted:
+                    searched = cached.restrict(
+                        extractor.start_frame,
+                        extractor.end_frame,
+                        extractor.region_pixels(),
+                    )
+                matches = recognizer.search_embeddings(
+                    searched, threshold=0.35, max_matches=max_matches, top_k=top_k
+                )
+
+            elif sampling == "adaptive":
+                extractor.release_video()
+                coarse_interval, fine_interval = extractor.determine_adaptive_intervals(
+                    processing_mode
+                )
+                sample_interval = fine_interval
+                matches = find_matches_adaptive(
+                    recognizer,
+                    video_path,
+                    coarse_interval,
+                    fine_interval,
+                    start_frame=extractor.start_frame,
+                    end_frame=extractor.end_frame or extractor.known_frame_count,
+                    frame_offset=extractor.frame_offset,
+                    roi=roi,
+                    threshold=0.35,
+                    queue_depth=queue_depth,
+                    progress_callback=progress_callback,
+                    cancel_event=cancel_event,
+                    max_matches=max_matches,
+                    top_k=top_k,
+                    shot_detection=shot_detection,
+                    tracking=tracking,
+                    memory_budget=memory_budget,
+                )
+
+            elif (
+                workers > 1
+                and replayable
+                and extractor.known_frame_count > 0
+                and max_matches is None
+            ):
+                extractor.release_video()
+                matches = find_matches_parallel(
+                    video_path,
+                    embedding,
+                    extractor.frame_interval,
+                    extractor.end_frame or extractor.known_frame_count,
+                    start_frame=extractor.start_frame,
+                    frame_offset=extractor.frame_offset,
+                    roi=roi,
+                    detector_backend=detector,
+                    labels=labels,
+                    threshold=0.35,
+                    workers=workers,
+                    progress_callback=progress_callback,
+                    cancel_event=cancel_event,
+                    top_k=top_k,
+                    shot_detection=shot_detection,
+                    prefilter=prefilter,
+                    tracking=tracking,
+                    detection_width=detection_width,
+                    memory_budget=memory_budget,
+                )
+            else:
+                batch_planner = BatchPlanner(memory_budget=memory_budget, tune=True)
+                extractor.batch_planner = batch_planner
+                success, frame_generator_or_error = extractor.process_video(
+                    pipelined=True, queue_depth=queue_depth
+                )
+                if not success:
+                    return {
+                        "success": False,
+                        "message": frame_generator_or_error,
+                        "matches": None,
+                    }
+
+                frame_generator = frame_generator_or_error
+
+                cache_writer = None
+                if cache is not None and max_matches is None and not restricted:
+                    cache_writer = cache.writer(
+                        cache_key,
+                        {
+                            "fps": extractor.fps,
+                            "frame_interval": extractor.frame_interval,
+                            "total_frames": extractor.total_frames,
+                            "detector_backend": detector,
+                            "model_name": recognizer.model_name,
+                            "shot_detection": shot_detection,
+                            "prefilter": prefilter,
+                            "detection_width": detection_width,
+                            "tracking": tracking,
+                        },
+                    )
+
+                matches = recognizer.find_matches(
+                    frame_generator,
+                    threshold=0.35,
+                    fps=extractor.fps,
+                    processable_frames=extractor.total_processable_frames,
+                    cache_writer=cache_writer,
+                    progress_callback=progress_callback,
+                    cancel_event=cancel_event,
+                    max_matches=max_matches,
+                    top_k=top_k,
+                    tracking=tracking,
+                    batch_planner=batch_planner,
+                )
+
+                if cache_writer is not None:
+                    # Extraction replaces an estimated frame count with the real one
+                    cache_writer.meta["total_frames"] = extractor.total_frames
+                    if cache_writer.commit() is not None:
+                        cached = cache.load(cache_key)
+
+            if index_dir and cached is not None:
+                # Concurrent jobs must not save over each other's videos
+                with FaceIndex.lock(index_dir):
+                    index = FaceIndex.open(index_dir)
+                    if index.add_cached(cached, cache_key, name=video_source):
+                        index.save(index_dir)
+
+            # Bridge a single missed sample (a blink, a turned head)
+            appearances = build_appearances(
+                matches, extractor.fps, max_gap=2 * sample_interval
+            )
             return {
                 "success": True,
                 "message": f"Process completed. {len(matches)} matches found.",
                 "matches": matches,
+                "appearances": appearances,
+            }
+
+        except RecognitionCancelled:
+            return {
+                "success": False,
+                "message": "Processing cancelled.",
+                "matches": None,
             }
 
         except Exception as e:
@@ -284,6 +728,58 @@ class FaceHuntCore:
             }
 
         finally:
-            if downloaded_video_path and os.path.exists(downloaded_video_path):
+            if downloader is not None and downloader.cache is not None:
+                # Cached videos stay for later requests; the cache evicts them
+                downloader.release()
+            elif downloaded_video_path and os.path.exists(downloaded_video_path):
                 print(f"Cleaning temporary file: {downloaded_video_path}")
                 os.remove(downloaded_video_path)
+
+    def query_index(self, image_path, index_dir, threshold=0.35, top_k=None):
+        """
+        Search every indexed video for the person in the reference image.
+
+        No video is decoded: only the reference image goes through DeepFace,
+        the rest is a lookup in the face index built by execute_workflow.
+
+        Args:
+            image_path (str): The file path to the reference image.
+            index_dir (str): Directory of the face index.
+            threshold (float): Cosine distance threshold.
+            top_k (int, optional): Return only the k closest appearances.
+
+        Returns:
+            dict: {"success": bool, "message": str, "matches": list | None}
+                  Matches include 'video_id', 'video', 'frame_index',
+                  'timestamp' and 'distance', closest first.
+        """
+        try:
+            if not os.path.exists(os.path.join(index_dir, "index.json")):
+                return {
+                    "success": False,
+                    "message": "The face index does not exist.",
+                    "matches": None,
+                }
+
+            success, embedding, message = self.validate_image_file(image_path)
+            if not success:
+                return {"success": False, "message": message, "matches": None}
+
+            with FaceIndex.lock(index_dir, exclusive=False):
+                index = FaceIndex.load(index_dir)
+            matches = index.search(embedding, threshold=threshold, top_k=top_k)
+            videos = len({match["video_id"] for match in matches})
+
+            return {
+                "success": True,
+                "message": f"{len(matches)} matches found in {videos} videos.",
+                "matches": matches,
+            }
+
+        except Exception as e:
+            traceback.print_exc()
+            return {
+                "success": False,
+                "message": f"An unexpected internal error occurred: {str(e)}",
+                "matches": None,
+            }
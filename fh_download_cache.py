@@ -0,0 +1,234 @@
+import glob
+import hashlib
+import os
+import re
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: entries are not locked across processes
+    fcntl = None
+
+
+class DownloadLease:
+    """
+    Lock on one download cache entry.
+
+    Held exclusively while the entry is downloaded, then shared while the
+    video is in use. Eviction skips entries whose lock it cannot take, so a
+    video is never deleted under a running job.
+    """
+
+    def __init__(self, lock_path):
+        """
+        Args:
+            lock_path: Lock file of the entry (created if missing)
+        """
+        self.lock_path = lock_path
+        self._file = open(lock_path, "a")
+
+    def lock(self, exclusive=True, blocking=True):
+        """
+        Take or convert the lock.
+
+        Returns:
+            bool: False if blocking is False and another holder has the lock
+        """
+        if fcntl is None:
+            return True
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        while True:
+            try:
+                fcntl.flock(self._file.fileno(), flags)
+            except BlockingIOError:
+                return False
+            if self._is_current():
+                return True
+            # Eviction removed the lock file meanwhile; lock the new one
+            self._file.close()
+            self._file = open(self.lock_path, "a")
+
+    def _is_current(self):
+        """True if the open lock file is still the one at lock_path."""
+        try:
+            return (
+                os.fstat(self._file.fileno()).st_ino == os.stat(self.lock_path).st_ino
+            )
+        except FileNotFoundError:
+            return False
+
+    def release(self):
+        """Release the lock."""
+        if not self._file.closed:
+            self._file.close()
+
+
+class DownloadCache:
+    """
+    On-disk store of downloaded videos with LRU eviction.
+
+    Entries are keyed by video ID and requested format, so the same video
+    is downloaded once and videos sharing a title no longer collide.
+    Downloads go to a temporary file that is renamed into place, and a lock
+    file per entry keeps concurrent jobs from downloading the same video
+    twice or evicting a video another job is reading. Reading an entry
+    refreshes its modification time, which orders eviction.
+    """
+
+    def __init__(self, cache_dir="videos", max_bytes=5 * 1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory where videos are stored
+            max_bytes: Size above which least recently used videos are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(video_id, format_spec):
+        """
+        Build the entry key of a video in a given format.
+
+        Returns:
+            str: Filesystem-safe key
+        """
+        safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", str(video_id))
+        format_hash = hashlib.sha1(format_spec.encode("utf-8")).hexdigest()[:8]
+        return f"{safe_id}_{format_hash}"
+
+    def _lock_path(self, key):
+        return os.path.join(self.cache_dir, f".{key}.lock")
+
+    def _entry_path(self, key):
+        """Stored video of an entry, or None if it is not cached."""
+        for path in glob.glob(os.path.join(self.cache_dir, glob.escape(key) + ".*")):
+            if not path.endswith(".part"):
+                return path
+        return None
+
+    def fetch(self, key, download):
+        """
+        Get a video from the cache, downloading it on a miss.
+
+        Args:
+            key: Entry key (see key)
+            download: Callable(output_template) that downloads the video to
+                      a yt-dlp output template ending in '.%(ext)s'
+
+        Returns:
+            tuple: (video_path, DownloadLease); release the lease once the
+                   video is no longer read
+
+        Raises:
+            Exception: Any error raised by download
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        lease = DownloadLease(self._lock_path(key))
+        try:
+            lease.lock(exclusive=False)
+            video_path = self._entry_path(key)
+            if video_path is None:
+                # Concurrent requests for the same video wait for one download
+                lease.lock(exclusive=True)
+                video_path = self._entry_path(key)
+                if video_path is None:
+                    video_path = self._download(key, download)
+                    self.evict()
+                lease.lock(exclusive=False)
+
+            os.utime(video_path)
+            print(f"[DownloadCache] Using {video_path}")
+            return video_path, lease
+        except Exception:
+            lease.release()
+            raise
+
+    def _download(self, key, download):
+        """Download to a temporary name and rename it into the cache."""
+        temp_prefix = os.path.join(self.cache_dir, f".{key}-{uuid.uuid4().hex}")
+        try:
+            download(temp_prefix + ".%(ext)s")
+            downloaded = [
+                path
+                for path in glob.glob(glob.escape(temp_prefix) + ".*")
+                if not path.endswith(".part")
+            ]
+            if not downloaded:
+                raise RuntimeError("The download produced no file")
+
+            extension = os.path.splitext(downloaded[0])[1]
+            video_path = os.path.join(self.cache_dir, key + extension)
+            os.replace(downloaded[0], video_path)
+            print(f"[DownloadCache] Stored: {video_path}")
+            return video_path
+        finally:
+            for path in glob.glob(glob.escape(temp_prefix) + ".*"):
+                os.remove(path)
+
+    def evict(self):
+        """
+        Delete least recently used videos until the cache fits max_bytes.
+
+        Videos locked by a running job are skipped. Lock files of deleted
+        videos, and of entries whose download never completed, are removed
+        too.
+
+        Returns:
+            int: Number of videos deleted
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, name, path))
+
+        total = sum(size for _, size, _, _ in entries)
+        evicted = 0
+        for _, size, name, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if not self._remove_unlocked(os.path.splitext(name)[0], path):
+                continue
+            total -= size
+            evicted += 1
+            print(f"[DownloadCache] Evicted {name} ({size // (1024 * 1024)} MB)")
+
+        for lock_path in glob.glob(os.path.join(self.cache_dir, ".*.lock")):
+            key = os.path.basename(lock_path)[1 : -len(".lock")]
+            if self._entry_path(key) is None:
+                self._remove_unlocked(key)
+        return evicted
+
+    def _remove_unlocked(self, key, video_path=None):
+        """
+        Delete an entry and its lock file unless a job holds its lock.
+
+        Args:
+            key: Entry key
+            video_path: Stored video to delete, None to remove only the lock
+                        file of an entry that has no video
+
+        Returns:
+            bool: True if the entry was removed
+        """
+        lease = DownloadLease(self._lock_path(key))
+        try:
+            if not lease.lock(exclusive=True, blocking=False):
+                return False
+            if video_path is None and self._entry_path(key) is not None:
+                # Downloaded since the caller looked
+                return False
+            if video_path is not None:
+                os.remove(video_path)
+            # Jobs that opened the old lock file notice it is gone and retry
+            os.remove(lease.lock_path)
+            return True
+        except OSError as e:
+            print(f"[DownloadCache] Could not evict {key}: {e}")
+            return False
+        finally:
+            lease.release()
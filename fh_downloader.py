@@ -1,65 +1,222 @@
+import copy
 import os
 import shutil
 import yt_dlp
 from unidecode import unidecode
 
+# Video-only or progressive MP4 at up to 480p, enough for face detection
+DOWNLOAD_FORMAT = "bestvideo[height<=480][ext=mp4]/best[ext=mp4]/best"
+
+# Single-file formats over HTTP(S), which OpenCV decodes while downloading
+STREAM_FORMAT = (
+    "bestvideo[height<=480][ext=mp4][protocol^=http]"
+    "/best[height<=480][protocol^=http]/best[protocol^=http]"
+)
+
 
 class VideoDownloader:
     """Handles YouTube video download with validations."""
 
-    def __init__(self, youtube_url):
+    def __init__(self, youtube_url, cache=None, metadata=None, ydl_factory=None):
         """
         Initialize video downloader.
 
         Args:
         youtube_url (str): YouTube video URL to download.
+        cache (DownloadCache, optional): Store downloads by video ID and keep
+                                         them for later requests. Call
+                                         release() once the video is no
+                                         longer read.
+        metadata (MetadataCache, optional): Reuse the video info fetched
+                                            during validation instead of
+                                            extracting it again.
+        ydl_factory (callable, optional): Callable(options) returning a
+                                          yt_dlp.YoutubeDL-like context
+                                          manager. Defaults to the metadata
+                                          cache's factory, or
+                                          yt_dlp.YoutubeDL.
         """
         self.youtube_url = youtube_url
-        self.output_dir = "videos"
+        self.cache = cache
+        self.metadata = metadata
+        if ydl_factory is None and metadata is not None:
+            ydl_factory = metadata.ydl_factory
+        self.ydl_factory = ydl_factory or yt_dlp.YoutubeDL
+        self.output_dir = cache.cache_dir if cache is not None else "videos"
+        self.lease = None
+        self.info = None
+        self.section = None
+        self.error = None
+
+    def _fetch_info(self):
+        """Video info from the metadata cache, or extracted if there is none."""
+        if self.metadata is not None:
+            return self.metadata.get(self.youtube_url)
+        with self.ydl_factory({"quiet": True, "noplaylist": True}) as ydl:
+            return ydl.extract_info(self.youtube_url, download=False)
+
+    def _process(self, info, format_spec, output_template=None, section=None):
+        """
+        Select a format from already extracted info, optionally downloading it.
+
+        yt-dlp re-runs only format selection (and the download) on the given
+        info, without another extraction round trip.
+
+        Args:
+            info: Info dictionary from _fetch_info
+            format_spec: yt-dlp format selector
+            output_template: Download to this yt-dlp output template (None
+                             only selects the format)
+            section: (start, end) seconds to download instead of the whole
+                     video
+
+        Returns:
+            dict: Info processed for the selected format; self.info is set
+                  to it
+        """
+        ydl_opts = {"format": format_spec, "noplaylist": True, "quiet": True}
+        if output_template is not None:
+            ydl_opts["outtmpl"] = output_template
+            ydl_opts["concurrent_fragment_downloads"] = 4
+        if section is not None:
+            ydl_opts["download_ranges"] = yt_dlp.utils.download_range_func(
+                None, [section]
+            )
+            # Cut exactly at the start so frame offsets are exact
+            ydl_opts["force_keyframes_at_cuts"] = True
+        with self.ydl_factory(ydl_opts) as ydl:
+            self.info = ydl.process_ie_result(
+                copy.deepcopy(info), download=output_template is not None
+            )
+        return self.info
+
+    @staticmethod
+    def _section(info, start_time, end_time):
+        """
+        Time section to download for a search range.
+
+        The end is clamped to the video's duration.
+
+        Returns:
+            tuple or None: (start, end) seconds, or None to download the
+                           whole video (no range, unknown duration, or no
+                           ffmpeg to cut sections with)
+
+        Raises:
+            ValueError: If the range starts before 0 or is empty
+        """
+        if start_time is None and end_time is None:
+            return None
+        start = float(start_time or 0)
+        if start < 0:
+            raise ValueError(f"Search range starts before the video ({start:g}s)")
 
-    def download(self):
+        duration = info.get("duration")
+        end = end_time if end_time is not None else duration
+        if not end:
+            return None
+        end = float(end)
+        if duration:
+            end = min(end, float(duration))
+        if end <= start:
+            raise ValueError(
+                f"Empty search range {start:g}s-{end:g}s"
+                + (f" (the video lasts {float(duration):g}s)" if duration else "")
+            )
+
+        if shutil.which("ffmpeg") is None:
+            print("[Downloader] ffmpeg not found, downloading the whole video")
+            return None
+        return start, end
+
+    def download(self, start_time=None, end_time=None):
         """
         Download YouTube video in MP4 format at 480p resolution.
 
         Validates disk space before downloading.
-        Skips download if video already exists.
+        Skips download if video already exists (in the cache, if any).
+        Afterwards self.info holds the info of the downloaded format.
+
+        Args:
+            start_time: Seconds where the needed part of the video starts
+            end_time: Seconds where it ends. With either one, only that
+                      section is downloaded and self.section holds its
+                      (start, end); the file then starts at start seconds.
 
         Returns:
             str or None: Path to downloaded video file, None on failure
+                         (self.error then holds the reason)
         """
+        self.error = None
         try:
             os.makedirs(self.output_dir, exist_ok=True)
 
-            with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
-                info = ydl.extract_info(self.youtube_url, download=False)
-                video_title = info["title"]
-                clean_title = self.sanitize_filename(video_title)
-                video_file = os.path.join(self.output_dir, f"{clean_title}.mp4")
+            info = self._fetch_info()
+            self.section = self._section(info, start_time, end_time)
+            format_key = DOWNLOAD_FORMAT
+            clean_title = self.sanitize_filename(info["title"])
+            if self.section is not None:
+                format_key += "@{:g}-{:g}".format(*self.section)
+                clean_title += "_{:g}-{:g}".format(*self.section)
+                print("[Downloader] Downloading only {:g}s-{:g}s".format(*self.section))
+            video_file = os.path.join(self.output_dir, f"{clean_title}.mp4")
+
+            def download_to(output_template):
+                # Checked only on a miss: cached videos need no space
+                disk_usage = shutil.disk_usage(self.output_dir)
+                if disk_usage.free < 500 * 1024 * 1024:
+                    raise RuntimeError("Insufficient disk space < 500MB.")
+                print(f"[Downloader] Downloading: {self.youtube_url}")
+                self._process(info, DOWNLOAD_FORMAT, output_template, self.section)
+
+            if self.cache is not None:
+                video_file, self.lease = self.cache.fetch(
+                    self.cache.key(info["id"], format_key), download_to
+                )
+            elif not os.path.exists(video_file):
+                download_to(os.path.join(self.output_dir, f"{clean_title}.%(ext)s"))
+                print(f"[Downloader] Download complete: {video_file}")
+
+            if self.info is None:
+                self._process(info, DOWNLOAD_FORMAT)
+            return video_file
 
-            disk_usage = shutil.disk_usage(self.output_dir)
-            if disk_usage.free < 500 * 1024 * 1024:
-                print("[Downloader] Insufficient disk space < 500MB.")
-                return None
+        except Exception as e:
+            self.error = str(e)
+            print(f"[Downloader] Download failed: {str(e)}")
+            return None
 
-            if os.path.exists(video_file):
-                return video_file
+    def release(self):
+        """Let the cache evict the downloaded video again."""
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
 
-            ydl_opts = {
-                "format": "bestvideo[height<=480][ext=mp4]/best[ext=mp4]/best",
-                "outtmpl": os.path.join(self.output_dir, f"{clean_title}.%(ext)s"),
-                "noplaylist": True,
-                "quiet": True,
-            }
+    def stream_url(self):
+        """
+        Resolve the direct media URL of the video for streaming.
 
-            print(f"[Downloader] Downloading: {self.youtube_url}")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([self.youtube_url])
+        Picks a single-file format served over HTTP(S) at up to 480p, which
+        OpenCV decodes while it downloads, so nothing is written to disk.
+        Afterwards self.info holds the info of the streamed format.
 
-            print(f"[Downloader] Download complete: {video_file}")
-            return video_file
+        Returns:
+            str or None: Media URL, None on failure
+        """
+        try:
+            info = self._process(self._fetch_info(), STREAM_FORMAT)
+            url = info.get("url")
+            if not url and info.get("requested_formats"):
+                url = info["requested_formats"][0].get("url")
+            if not url:
+                print("[Downloader] No streamable format found")
+                return None
+
+            print(f"[Downloader] Streaming: {info.get('title', self.youtube_url)}")
+            return url
 
         except Exception as e:
-            print(f"[Downloader] Download failed: {str(e)}")
+            print(f"[Downloader] Could not resolve stream URL: {str(e)}")
             return None
 
     @staticmethod
@@ -0,0 +1,250 @@
+import copy
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from fh_file_lock import FileLock
+
+
+class CachedEmbeddings:
+    """Every face detected in one video, loaded from an EmbeddingCache entry."""
+
+    def __init__(self, path):
+        """
+        Load a cache entry. Embeddings are memory-mapped, not read into RAM.
+
+        Args:
+            path: Directory of the cache entry
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.boxes = np.load(os.path.join(path, "boxes.npy"), mmap_mode="r")
+        self.frame_indices = np.load(os.path.join(path, "frames.npy"), mmap_mode="r")
+        self.fps = self.meta["fps"]
+
+    def restrict(self, start_frame=0, end_frame=None, region=None):
+        """
+        Faces inside a frame range and image region.
+
+        Args:
+            start_frame: First frame to keep
+            end_frame: Frame where the range ends, exclusive (None for the end)
+            region: (x0, y0, x1, y1) pixels; faces whose box center lies
+                    outside are dropped (None for the whole frame)
+
+        Returns:
+            CachedEmbeddings: Copy holding only the selected faces
+        """
+        keep = self.frame_indices >= start_frame
+        if end_frame is not None:
+            keep &= self.frame_indices < end_frame
+        if region is not None and len(self.boxes) > 0:
+            x0, y0, x1, y1 = region
+            centers_x = self.boxes[:, 0] + self.boxes[:, 2] / 2
+            centers_y = self.boxes[:, 1] + self.boxes[:, 3] / 2
+            keep &= (centers_x >= x0) & (centers_x < x1)
+            keep &= (centers_y >= y0) & (centers_y < y1)
+
+        restricted = copy.copy(self)
+        restricted.embeddings = np.asarray(self.embeddings[keep])
+        restricted.boxes = np.asarray(self.boxes[keep])
+        restricted.frame_indices = np.asarray(self.frame_indices[keep])
+        return restricted
+
+
+class EmbeddingCacheWriter:
+    """Collects detected faces during recognition and stores them atomically."""
+
+    def __init__(self, cache_dir, key, meta):
+        """
+        Args:
+            cache_dir: Root directory of the cache
+            key: Entry key (see EmbeddingCache.key)
+            meta: Video metadata stored with the entry (fps, interval, ...)
+        """
+        self.cache_dir = cache_dir
+        self.key = key
+        self.meta = dict(meta)
+        self.sampled_frames = 0
+        self.failed_frames = 0
+        self._embeddings = []
+        self._boxes = []
+        self._frame_indices = []
+
+    def add(self, faces, sampled_frames=0, failed_frames=0):
+        """
+        Add the faces of one recognized batch.
+
+        Args:
+            faces: BatchFaces produced by FaceRecognizer
+            sampled_frames: Number of frames in the batch, with or without faces
+            failed_frames: Frames of the batch that could not be recognized
+                           for a reason other than having no faces
+        """
+        self.sampled_frames += sampled_frames
+        self.failed_frames += failed_frames
+        if len(faces.embeddings) == 0:
+            return
+        self._embeddings.append(np.asarray(faces.embeddings, dtype=np.float32))
+        self._boxes.append(np.asarray(faces.boxes, dtype=np.int32))
+        self._frame_indices.append(
+            np.asarray(faces.frame_indices, dtype=np.int64)[faces.owners]
+        )
+
+    def commit(self):
+        """
+        Write the entry to disk.
+
+        Files are written to a temporary directory and renamed into place
+        while holding the entry's lock, so readers never see a partially
+        written entry. If another job already stored a readable entry under
+        the same key, it describes the same video and configuration and is
+        kept; an unreadable one is moved aside before the rename.
+
+        Nothing is stored if any frame failed, since later searches would
+        silently miss the faces of those frames.
+
+        Returns:
+            str or None: Path of the stored entry, None if it was incomplete
+        """
+        if self.failed_frames:
+            print(
+                f"[EmbeddingCache] Not storing {self.key}: "
+                f"{self.failed_frames} frames failed"
+            )
+            return None
+
+        if self._embeddings:
+            embeddings = np.concatenate(self._embeddings)
+            boxes = np.concatenate(self._boxes)
+            frame_indices = np.concatenate(self._frame_indices)
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+            boxes = np.empty((0, 4), dtype=np.int32)
+            frame_indices = np.empty(0, dtype=np.int64)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_path = os.path.join(self.cache_dir, self.key)
+        temp_dir = tempfile.mkdtemp(prefix=f".{self.key}-", dir=self.cache_dir)
+        stale_dir = None
+        try:
+            np.save(os.path.join(temp_dir, "embeddings.npy"), embeddings)
+            np.save(os.path.join(temp_dir, "boxes.npy"), boxes)
+            np.save(os.path.join(temp_dir, "frames.npy"), frame_indices)
+
+            meta = dict(
+                self.meta, faces=len(embeddings), sampled_frames=self.sampled_frames
+            )
+            with open(os.path.join(temp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            with FileLock(os.path.join(self.cache_dir, f".{self.key}.lock")):
+                if os.path.exists(entry_path):
+                    try:
+                        CachedEmbeddings(entry_path)
+                        print(f"[EmbeddingCache] Entry already stored: {entry_path}")
+                        return entry_path
+                    except (OSError, ValueError, KeyError):
+                        stale_dir = f"{temp_dir}-stale"
+                        os.replace(entry_path, stale_dir)
+                os.replace(temp_dir, entry_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if stale_dir is not None:
+                shutil.rmtree(stale_dir, ignore_errors=True)
+
+        print(f"[EmbeddingCache] Stored {len(embeddings)} faces: {entry_path}")
+        return entry_path
+
+
+class EmbeddingCache:
+    """
+    On-disk store of every face embedding detected in a video.
+
+    Entries are keyed by the video's content hash, sampling interval and
+    detector, so re-running a video with another reference image or threshold
+    is pure vector math.
+    """
+
+    def __init__(self, cache_dir="embeddings"):
+        """
+        Args:
+            cache_dir: Directory where entries are stored
+        """
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def hash_video(video_path, chunk_size=1024 * 1024):
+        """
+        Compute the SHA-256 content hash of a video file.
+
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        with open(video_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(
+        video_hash,
+        frame_interval,
+        detector_backend,
+        shot_detection=False,
+        prefilter=False,
+        detection_width=None,
+        tracking=False,
+    ):
+        """
+        Build the entry key for a video and sampling configuration.
+
+        Entries built with shot detection, the face prefilter or downscaled
+        detection may miss faces an exhaustive pass would find, and entries
+        built with tracking hold reused rather than fresh embeddings, so they
+        are kept apart.
+
+        Returns:
+            str: Key used as the entry directory name
+        """
+        key = f"{video_hash[:32]}_i{frame_interval}_{detector_backend}"
+        if shot_detection:
+            key += "_shots"
+        if prefilter:
+            key += "_haar"
+        if detection_width:
+            key += f"_d{detection_width}"
+        if tracking:
+            key += "_trk"
+        return key
+
+    def load(self, key):
+        """
+        Load an entry if it exists.
+
+        Returns:
+            CachedEmbeddings or None: Entry, or None on cache miss
+        """
+        entry_path = os.path.join(self.cache_dir, key)
+        if not os.path.exists(os.path.join(entry_path, "meta.json")):
+            return None
+        try:
+            return CachedEmbeddings(entry_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[EmbeddingCache] Ignoring unreadable entry {key}: {e}")
+            return None
+
+    def writer(self, key, meta):
+        """
+        Create a writer for a new entry.
+
+        Returns:
+            EmbeddingCacheWriter: Writer to pass to FaceRecognizer.find_matches
+        """
+        return EmbeddingCacheWriter(self.cache_dir, key, meta)
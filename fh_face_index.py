@@ -0,0 +1,470 @@
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import numpy as np
+from fh_file_lock import FileLock
+from fh_tracker import format_timestamp
+
+
+def _normalize_rows(vectors):
+    """Scale rows to unit length so dot products are cosine similarities."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _spherical_kmeans(vectors, n_clusters, n_iter=20, seed=0):
+    """
+    Cluster unit vectors by cosine similarity.
+
+    Args:
+        vectors: Unit-normalized vectors with shape (n, dim)
+        n_clusters: Number of centroids
+        n_iter: Lloyd iterations
+        seed: Random seed for initialization
+
+    Returns:
+        np.ndarray: Unit-normalized centroids with shape (n_clusters, dim)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(n_clusters):
+            members = vectors[assignments == cluster]
+            if len(members) == 0:
+                centroids[cluster] = vectors[rng.integers(len(vectors))]
+            else:
+                centroids[cluster] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+
+    return centroids
+
+
+class _Shard:
+    """
+    Faces of one indexed video, stored in their own directory.
+
+    Shards are written once and memory-mapped when read, so inserting a
+    video never rewrites the others. Partition assignments depend on the
+    centroids and are stored per training generation next to the faces.
+    """
+
+    def __init__(self, path=None, embeddings=None, frame_indices=None):
+        """
+        Args:
+            path: Directory of a stored shard, loaded lazily (None if new)
+            embeddings: Unit-normalized embeddings of a new shard
+            frame_indices: Frame index of each face of a new shard
+        """
+        self.path = path
+        self._embeddings = embeddings
+        self._frame_indices = frame_indices
+        self.assignments = None
+        self.generation = None
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = self._load("embeddings.npy")
+        return self._embeddings
+
+    @property
+    def frame_indices(self):
+        if self._frame_indices is None:
+            self._frame_indices = self._load("frames.npy")
+        return self._frame_indices
+
+    def load_assignments(self, generation):
+        """Read the partition of each face under a training generation."""
+        self.assignments = self._load(f"lists-{generation}.npy")
+        self.generation = generation
+
+
+class FaceIndex:
+    """
+    Inverted-file (IVF) index of FaceNet embeddings across a video library.
+
+    Embeddings are partitioned with spherical k-means. A query only scans the
+    n_probe partitions whose centroids are closest to the reference, so search
+    cost grows sub-linearly with the library. Until enough faces are inserted
+    to train the partitions, the index is searched exhaustively.
+
+    On disk, every video is an append-only shard of memory-mapped arrays and
+    a small index.json manifest lists them. The partitions are trained again
+    each time the library doubles, so centroids fitted on the first videos do
+    not skew the partitions of a much larger library.
+    """
+
+    def __init__(self, n_lists=256, n_probe=16, min_train_per_list=39):
+        """
+        Args:
+            n_lists: Number of k-means partitions
+            n_probe: Partitions scanned per query (higher is more exact)
+            min_train_per_list: Faces per partition needed before training
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_per_list = min_train_per_list
+
+        self.centroids = None
+        self.generation = 0
+        self.trained_size = 0
+        self.videos = []
+        self.shards = []
+
+    def __len__(self):
+        return sum(video["faces"] for video in self.videos)
+
+    @property
+    def is_trained(self):
+        """True once the k-means partitions have been fitted."""
+        return self.centroids is not None
+
+    def contains(self, video_id):
+        """Check whether a video has already been indexed."""
+        return any(video["id"] == video_id for video in self.videos)
+
+    def add(self, embeddings, frame_indices, video_id, fps, name=None):
+        """
+        Insert the faces of one video.
+
+        Trains the partitions once enough faces are indexed, and again every
+        time the library has doubled since the last training.
+
+        Args:
+            embeddings: Face embeddings with shape (faces, dim)
+            frame_indices: Frame index of each face
+            video_id: Unique identifier of the video (e.g. embedding cache key)
+            fps: Video frames per second, used for timestamps
+            name: Human-readable source (file name or URL)
+
+        Returns:
+            int: Number of faces inserted
+        """
+        if self.contains(video_id):
+            print(f"[FaceIndex] Video already indexed: {video_id}")
+            return 0
+
+        frame_indices = np.asarray(frame_indices, dtype=np.int64)
+        if len(frame_indices) == 0:
+            return 0
+        vectors = _normalize_rows(embeddings)
+
+        shard = _Shard(embeddings=vectors, frame_indices=frame_indices)
+        self.videos.append(
+            {
+                "id": video_id,
+                "name": name or video_id,
+                "fps": fps,
+                "faces": len(vectors),
+                "shard": uuid.uuid4().hex,
+            }
+        )
+        self.shards.append(shard)
+
+        if self.is_trained and len(self) < 2 * self.trained_size:
+            shard.assignments = self._assign(vectors)
+            shard.generation = self.generation
+        elif len(self) >= self.n_lists * self.min_train_per_list:
+            self.train()
+
+        print(f"[FaceIndex] Indexed {len(vectors)} faces from {name or video_id}")
+        return len(vectors)
+
+    def add_cached(self, cached, video_id, name=None):
+        """
+        Insert a video from an embedding cache entry.
+
+        Args:
+            cached: CachedEmbeddings loaded from an EmbeddingCache
+            video_id: Unique identifier of the video
+            name: Human-readable source
+
+        Returns:
+            int: Number of faces inserted
+        """
+        return self.add(
+            cached.embeddings, cached.frame_indices, video_id, cached.fps, name=name
+        )
+
+    def train(self, max_train_size=100_000, seed=0):
+        """
+        Partition the stored embeddings with spherical k-means.
+
+        Fits the centroids on a sample drawn from every video, then assigns
+        all faces again under a new training generation.
+
+        Args:
+            max_train_size: Faces sampled to fit the centroids
+            seed: Random seed
+        """
+        total = len(self)
+        n_lists = min(self.n_lists, total)
+        rng = np.random.default_rng(seed)
+        rows = np.arange(total)
+        if total > max_train_size:
+            rows = np.sort(rng.choice(total, max_train_size, replace=False))
+
+        sample = []
+        offset = 0
+        for shard, video in zip(self.shards, self.videos):
+            end = offset + video["faces"]
+            local = rows[(rows >= offset) & (rows < end)] - offset
+            if len(local) > 0:
+                sample.append(np.asarray(shard.embeddings[local]))
+            offset = end
+        sample = np.concatenate(sample)
+
+        print(f"[FaceIndex] Training {n_lists} partitions on {len(sample)} faces...")
+        self.centroids = _spherical_kmeans(sample, n_lists, seed=seed)
+        self.generation += 1
+        self.trained_size = total
+        for shard in self.shards:
+            shard.assignments = self._assign(shard.embeddings)
+            shard.generation = self.generation
+
+    def _assign(self, vectors, chunk_size=65536):
+        """Assign unit vectors to their nearest centroid."""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = np.asarray(vectors[start : start + chunk_size])
+            assignments[start : start + chunk_size] = np.argmax(
+                chunk @ self.centroids.T, axis=1
+            )
+        return assignments
+
+    def search(self, reference_embedding, threshold=0.35, top_k=None):
+        """
+        Find faces similar to a reference across all indexed videos.
+
+        Only the rows of the n_probe closest partitions are read from each
+        shard, so most of the memory-mapped embeddings are never touched.
+
+        Args:
+            reference_embedding: FaceNet embedding of the person to find
+            threshold: Cosine distance threshold (None to disable)
+            top_k: Return only the k closest faces (None for all)
+
+        Returns:
+            list: Dictionaries with 'video_id', 'video', 'frame_index',
+                  'timestamp' and 'distance', closest first
+        """
+        if len(self) == 0:
+            return []
+
+        reference = _normalize_rows(reference_embedding)[0]
+        lists = None
+        if self.is_trained:
+            n_probe = min(self.n_probe, len(self.centroids))
+            lists = np.argsort(-(self.centroids @ reference))[:n_probe]
+
+        found_distances = []
+        found_refs = []
+        found_frames = []
+        for video_ref, shard in enumerate(self.shards):
+            if lists is None:
+                rows = np.arange(self.videos[video_ref]["faces"])
+            else:
+                rows = np.flatnonzero(np.isin(shard.assignments, lists))
+            if len(rows) == 0:
+                continue
+            distances = 1.0 - np.asarray(shard.embeddings[rows]) @ reference
+
+            if threshold is not None:
+                keep = distances < threshold
+                rows, distances = rows[keep], distances[keep]
+            if top_k is not None and top_k < len(rows):
+                best = np.argpartition(distances, top_k)[:top_k]
+                rows, distances = rows[best], distances[best]
+
+            found_distances.append(distances)
+            found_refs.append(np.full(len(rows), video_ref))
+            found_frames.append(np.asarray(shard.frame_indices[rows]))
+
+        if not found_distances:
+            return []
+        distances = np.concatenate(found_distances)
+        video_refs = np.concatenate(found_refs)
+        frame_indices = np.concatenate(found_frames)
+
+        order = np.argsort(distances)
+        if top_k is not None:
+            order = order[:top_k]
+
+        results = []
+        for pos in order:
+            video = self.videos[video_refs[pos]]
+            frame_idx = int(frame_indices[pos])
+            results.append(
+                {
+                    "video_id": video["id"],
+                    "video": video["name"],
+                    "frame_index": frame_idx,
+                    "timestamp": format_timestamp(frame_idx, video["fps"]),
+                    "distance": float(distances[pos]),
+                }
+            )
+        return results
+
+    def save(self, index_dir):
+        """
+        Save new videos and partitions, then swap the manifest atomically.
+
+        Shards already stored in index_dir are left untouched, so saving
+        after an insertion writes only the new video (plus every shard's
+        assignments after a retraining). Readers see either the old or the
+        new index.json. Hold lock(index_dir) around load, update and save so
+        concurrent jobs do not lose each other's videos.
+
+        Args:
+            index_dir: Directory to write the index to
+        """
+        shards_dir = os.path.join(index_dir, "shards")
+        os.makedirs(shards_dir, exist_ok=True)
+
+        for shard, video in zip(self.shards, self.videos):
+            path = os.path.join(shards_dir, video["shard"])
+            if shard.path != path:
+                self._write_shard(shard, path)
+            lists_path = os.path.join(path, f"lists-{shard.generation}.npy")
+            if shard.generation is not None and not os.path.exists(lists_path):
+                self._save_array(lists_path, shard.assignments)
+
+        centroids = None
+        if self.is_trained:
+            centroids = f"centroids-{self.generation}.npy"
+            centroids_path = os.path.join(index_dir, centroids)
+            if not os.path.exists(centroids_path):
+                self._save_array(centroids_path, self.centroids)
+
+        meta = {
+            "n_lists": self.n_lists,
+            "n_probe": self.n_probe,
+            "min_train_per_list": self.min_train_per_list,
+            "generation": self.generation,
+            "trained_size": self.trained_size,
+            "centroids": centroids,
+            "videos": self.videos,
+        }
+        fd, temp_path = tempfile.mkstemp(prefix=".index-", dir=index_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(temp_path, os.path.join(index_dir, "index.json"))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self._remove_stale(index_dir, centroids)
+
+    @staticmethod
+    def _save_array(path, array):
+        """Write one .npy file under a temporary name and rename it in."""
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.save(f, np.asarray(array))
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _write_shard(shard, path):
+        """Store a shard's faces in a new directory."""
+        temp_dir = tempfile.mkdtemp(prefix=".shard-", dir=os.path.dirname(path))
+        try:
+            np.save(os.path.join(temp_dir, "embeddings.npy"), shard.embeddings)
+            np.save(os.path.join(temp_dir, "frames.npy"), shard.frame_indices)
+            if os.path.exists(path):
+                # Left over by a save that failed before its manifest swap
+                shutil.rmtree(path)
+            os.replace(temp_dir, path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        shard.path = path
+
+    def _remove_stale(self, index_dir, centroids):
+        """Delete centroids and assignments of earlier training generations."""
+        current = f"lists-{self.generation}.npy"
+        stale = [
+            os.path.join(index_dir, name)
+            for name in os.listdir(index_dir)
+            if name.startswith("centroids-") and name != centroids
+        ]
+        for shard in self.shards:
+            stale.extend(
+                os.path.join(shard.path, name)
+                for name in os.listdir(shard.path)
+                if name.startswith("lists-") and name != current
+            )
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                # Still memory-mapped by a reader on Windows; removed next save
+                pass
+
+    @staticmethod
+    def lock(index_dir, exclusive=True):
+        """
+        File lock serializing access to an index across jobs and processes.
+
+        Args:
+            index_dir: Directory of the index
+            exclusive: Exclusive for updates, shared for searches
+
+        Returns:
+            FileLock: Lock to use as a context manager
+        """
+        index_dir = os.path.abspath(index_dir)
+        os.makedirs(os.path.dirname(index_dir), exist_ok=True)
+        return FileLock(index_dir + ".lock", exclusive=exclusive)
+
+    @classmethod
+    def load(cls, index_dir):
+        """
+        Load an index saved with save().
+
+        Only the manifest, centroids and partition assignments are read;
+        embeddings stay memory-mapped until a search or training needs them.
+
+        Returns:
+            FaceIndex: Loaded index
+        """
+        with open(os.path.join(index_dir, "index.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        index = cls(meta["n_lists"], meta["n_probe"], meta["min_train_per_list"])
+        index.videos = meta["videos"]
+        index.generation = meta["generation"]
+        index.trained_size = meta["trained_size"]
+        if meta["centroids"] is not None:
+            index.centroids = np.load(os.path.join(index_dir, meta["centroids"]))
+
+        for video in index.videos:
+            shard = _Shard(path=os.path.join(index_dir, "shards", video["shard"]))
+            if index.is_trained:
+                shard.load_assignments(index.generation)
+            index.shards.append(shard)
+        return index
+
+    @classmethod
+    def open(cls, index_dir, **kwargs):
+        """
+        Load an index if it exists, otherwise create an empty one.
+
+        Returns:
+            FaceIndex: Index ready for insertion and search
+        """
+        if os.path.exists(os.path.join(index_dir, "index.json")):
+            return cls.load(index_dir)
+        return cls(**kwargs)
@@ -1,128 +1,918 @@
+import heapq
+import time
+import cv2
 from deepface import DeepFace
+from deepface.models.Detector import FacialAreaRegion
+from deepface.modules import detection, preprocessing
 import numpy as np
+from fh_tracker import FaceTracker, format_timestamp
+
+
+class RecognitionCancelled(Exception):
+    """Raised by find_matches when its cancel_event is set."""
+
+
+class BatchFaces:
+    """Faces detected and embedded in one batch of frames."""
+
+    def __init__(self, frame_indices, embeddings, owners, boxes, errors):
+        """
+        Args:
+            frame_indices: Indexes of the frames where faces were found
+            embeddings: Face embeddings with shape (faces, embedding_size)
+            owners: Position in frame_indices of the frame each face belongs to
+            boxes: Face boxes (x, y, w, h) with shape (faces, 4)
+            errors: Exceptions raised by frames that could not be represented
+        """
+        self.frame_indices = frame_indices
+        self.embeddings = embeddings
+        self.owners = owners
+        self.boxes = boxes
+        self.errors = errors
+
+    @classmethod
+    def empty(cls, errors):
+        """Result of a batch in which no face could be represented."""
+        return cls(
+            [],
+            np.empty((0, 0), dtype=np.float32),
+            np.empty(0, dtype=int),
+            np.empty((0, 4), dtype=np.int32),
+            errors,
+        )
 
 
 class FaceRecognizer:
     """Performs face recognition on video frames using FaceNet embeddings."""
 
-    def __init__(self, reference_embedding, detector_backend="mtcnn"):
+    def __init__(
+        self,
+        reference_embedding,
+        detector_backend="mtcnn",
+        labels=None,
+        model=None,
+        prefilter=None,
+        detection_width=None,
+    ):
         """
         Initialize face recognizer with reference embedding.
         Args:
-            reference_embedding: FaceNet embedding from reference image
+            reference_embedding: FaceNet embedding from reference image, or a
+                                 matrix with one embedding per row (gallery mode)
             detector_backend: Face detector to use. Options:
                 - 'opencv': Fast, less accurate (default)
                 - 'mtcnn': Good accuracy, slower
                 - 'retinaface': Best accuracy, slowest
+            labels: Identity name for each gallery row. Every gallery match is
+                    tagged with the 'label' of the reference it matched.
+                    Defaults to 'reference_1', 'reference_2', ...
+            model: Already built FaceNet model (e.g. from a ModelRegistry).
+                   Built on first use when omitted.
+            prefilter: Optional cheap face-presence check (e.g. HaarPrefilter)
+                       with a has_faces(frame) method. Frames it rejects never
+                       reach the main detector.
+            detection_width: Run the detector on frames downscaled to this
+                             width. Boxes are mapped back and face crops are
+                             taken from the full-resolution frame. None or
+                             0 detects at full resolution.
+
+        Raises:
+            ValueError: If labels do not match the references or
+                        detection_width is negative
         """
-        self.reference_embedding = np.array(reference_embedding)
-        self.reference_norm = np.linalg.norm(self.reference_embedding)
+        references = np.atleast_2d(np.asarray(reference_embedding, dtype=np.float32))
+        if labels is None and len(references) > 1:
+            labels = [f"reference_{i + 1}" for i in range(len(references))]
+        if labels is not None and len(labels) != len(references):
+            raise ValueError("labels must have one entry per reference embedding")
+        if detection_width is not None and detection_width < 0:
+            raise ValueError("detection_width cannot be negative")
+
+        self.reference_embeddings = references / np.linalg.norm(
+            references, axis=1, keepdims=True
+        )
+        self.labels = list(labels) if labels is not None else None
         self.model_name = "Facenet"
         self.detector_backend = detector_backend
+        self.model = model
+        self.prefilter = prefilter
+        self.detection_width = detection_width or None
 
-    def find_matches(
+    def _build_model(self):
+        """
+        Build the FaceNet model once and reuse it for every batch.
+
+        Returns:
+            FacialRecognition: DeepFace model client exposing the Keras model
+        """
+        if self.model is None:
+            self.model = DeepFace.build_model(self.model_name)
+        return self.model
+
+    def _detect_faces(self, frame):
+        """
+        Detect and align faces in a frame, returning FaceNet-ready crops.
+
+        Mirrors the preprocessing done by DeepFace.represent so embeddings
+        match the per-frame path exactly. Frames wider than detection_width
+        are handed to _detect_faces_downscaled.
+
+        Args:
+            frame: Frame as numpy array
+
+        Returns:
+            tuple: (crops: list of preprocessed faces with shape
+                    (height, width, 3), boxes: list of (x, y, w, h))
+
+        Raises:
+            ValueError: If no face is detected in the frame
+        """
+        if self.detection_width and frame.shape[1] > self.detection_width:
+            return self._detect_faces_downscaled(frame)
+
+        faces = DeepFace.extract_faces(
+            img_path=frame,
+            detector_backend=self.detector_backend,
+            enforce_detection=True,
+            align=True,
+        )
+
+        crops = []
+        boxes = []
+        for face in faces:
+            crops.append(self._prepare_crop(face["face"][:, :, ::-1]))
+            boxes.append(self._face_box(face["facial_area"]))
+        return crops, boxes
+
+    def _detect_faces_downscaled(self, frame):
+        """
+        Detect on a downscaled copy, then crop and align at full resolution.
+
+        Detector cost grows with pixel count, while FaceNet only sees a
+        160x160 crop. Boxes and eye landmarks found on the small frame are
+        scaled back and DeepFace's own alignment is applied to the original
+        pixels, so crops keep their full-resolution detail.
+
+        Args:
+            frame: Frame as numpy array, wider than detection_width
+
+        Returns:
+            tuple: Same as _detect_faces, boxes in full-resolution pixels
+
+        Raises:
+            ValueError: If no face is detected in the frame
+        """
+        height, width = frame.shape[:2]
+        scale = width / self.detection_width
+        small = cv2.resize(
+            frame,
+            (self.detection_width, max(1, round(height / scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        faces = DeepFace.extract_faces(
+            img_path=small,
+            detector_backend=self.detector_backend,
+            enforce_detection=True,
+            align=False,
+        )
+
+        crops = []
+        boxes = []
+        for face in faces:
+            area = face["facial_area"]
+            region = FacialAreaRegion(
+                x=round(area["x"] * scale),
+                y=round(area["y"] * scale),
+                w=round(area["w"] * scale),
+                h=round(area["h"] * scale),
+                left_eye=self._scale_point(area.get("left_eye"), scale),
+                right_eye=self._scale_point(area.get("right_eye"), scale),
+                confidence=face.get("confidence"),
+            )
+            detected = detection.extract_face(
+                facial_area=region,
+                img=frame,
+                align=True,
+                expand_percentage=0,
+                width_border=0,
+                height_border=0,
+                detector_backend=self.detector_backend,
+            )
+            if detected.img.shape[0] == 0 or detected.img.shape[1] == 0:
+                continue
+            # Scale to [0, 1] like DeepFace.extract_faces before resizing
+            crops.append(self._prepare_crop(detected.img.astype(np.float32) / 255))
+            boxes.append((region.x, region.y, region.w, region.h))
+
+        if not crops:
+            raise ValueError("Face could not be detected at full resolution")
+        return crops, boxes
+
+    @staticmethod
+    def _scale_point(point, scale):
+        """Scale an (x, y) landmark, keeping None as None."""
+        if point is None:
+            return None
+        return (round(point[0] * scale), round(point[1] * scale))
+
+    def _prepare_crop(self, face):
+        """
+        Resize and normalize a face crop the way DeepFace.represent does.
+
+        Args:
+            face: Aligned face crop, in the channel order of the input frame
+
+        Returns:
+            np.ndarray: FaceNet input with shape (height, width, 3)
+        """
+        target_height, target_width = self._build_model().input_shape
+        img = preprocessing.resize_image(
+            img=face, target_size=(target_width, target_height)
+        )
+        img = preprocessing.normalize_input(img=img, normalization="base")
+        return img[0]
+
+    @staticmethod
+    def _face_box(facial_area):
+        """Convert a DeepFace facial_area dict to an (x, y, w, h) tuple."""
+        return (
+            facial_area["x"],
+            facial_area["y"],
+            facial_area["w"],
+            facial_area["h"],
+        )
+
+    def _embed_faces(self, crops):
+        """
+        Run FaceNet once over a stack of face crops.
+
+        Args:
+            crops: List of preprocessed face crops
+
+        Returns:
+            np.ndarray: Embeddings with shape (len(crops), embedding_size)
+        """
+        model = self._build_model()
+        return np.asarray(model.model.predict_on_batch(np.stack(crops)))
+
+    def _represent_batch(self, batch, tracker=None, faceless=(), new_shots=()):
+        """
+        Detect faces across the whole batch and embed them in a single call.
+
+        Args:
+            batch: List of (frame, frame_index) tuples
+            tracker: Optional FaceTracker. Faces continuing a track reuse the
+                     track's embedding instead of going through FaceNet.
+            faceless: Frame indices of the batch known to have no faces (e.g.
+                      rejected by the prefilter); they are not detected but
+                      still age the tracks
+            new_shots: Frame indices where a new shot starts; tracks do not
+                       continue across them
+
+        Returns:
+            BatchFaces: Faces of the batch with their embeddings
+        """
+        frame_indices = []
+        crops = []
+        sources = []
+        boxes = []
+        owners = []
+        errors = []
+
+        for frame, frame_idx in batch:
+            if tracker is not None and frame_idx in new_shots:
+                tracker.reset()
+            if frame_idx in faceless:
+                if tracker is not None:
+                    tracker.update([])
+                continue
+            try:
+                faces, face_boxes = self._detect_faces(frame)
+            except Exception as e:
+                errors.append(e)
+                if tracker is not None:
+                    tracker.update([])
+                continue
+
+            if tracker is not None:
+                assignments = tracker.update(face_boxes)
+            else:
+                assignments = [(None, True)] * len(faces)
+            for face, (track, needs_embedding) in zip(faces, assignments):
+                if needs_embedding:
+                    sources.append((track, len(crops)))
+                    crops.append(face)
+                else:
+                    sources.append((track, None))
+
+            owners.extend([len(frame_indices)] * len(faces))
+            frame_indices.append(frame_idx)
+            boxes.extend(face_boxes)
+
+        if not sources:
+            return BatchFaces.empty(errors)
+
+        try:
+            embedded = self._embed_faces(crops) if crops else None
+        except Exception as e:
+            if tracker is not None:
+                tracker.reset()
+            return BatchFaces.empty(errors + [e] * len(frame_indices))
+
+        embeddings = []
+        for track, crop_idx in sources:
+            if crop_idx is None:
+                embeddings.append(track.embedding)
+                continue
+            embeddings.append(embedded[crop_idx])
+            if track is not None:
+                track.embedding = embedded[crop_idx]
+
+        return BatchFaces(
+            frame_indices,
+            np.asarray(embeddings, dtype=np.float32),
+            np.asarray(owners),
+            np.asarray(boxes, dtype=np.int32),
+            errors,
+        )
+
+    def _represent_frames(self, batch):
+        """
+        Represent frames one at a time with DeepFace.represent.
+
+        Kept as the reference implementation for benchmarking the batched path.
+
+        Args:
+            batch: List of (frame, frame_index) tuples
+
+        Returns:
+            BatchFaces: Faces of the batch with their embeddings
+        """
+        frame_indices = []
+        embeddings = []
+        boxes = []
+        owners = []
+        errors = []
+
+        for frame, frame_idx in batch:
+            try:
+                result = DeepFace.represent(
+                    frame,
+                    model_name=self.model_name,
+                    enforce_detection=True,
+                    detector_backend=self.detector_backend,
+                )
+
+                if isinstance(result, dict):
+                    result = [result]
+
+                owners.extend([len(frame_indices)] * len(result))
+                frame_indices.append(frame_idx)
+                for face_data in result:
+                    embeddings.append(face_data["embedding"])
+                    boxes.append(self._face_box(face_data["facial_area"]))
+
+            except Exception as e:
+                errors.append(e)
+
+        if not embeddings:
+            return BatchFaces.empty(errors)
+        return BatchFaces(
+            frame_indices,
+            np.asarray(embeddings, dtype=np.float32),
+            np.asarray(owners),
+            np.asarray(boxes, dtype=np.int32),
+            errors,
+        )
+
+    @staticmethod
+    def _is_no_face(error):
+        """True for the error raised on frames without faces, which is expected."""
+        if not isinstance(error, ValueError):
+            return False
+        return "Face could not be detected" in str(error)
+
+    @staticmethod
+    def _spread_shot_faces(batch, faces, shot_faces=None):
+        """
+        Give frames skipped by shot detection the faces of their shot.
+
+        The extractor yields (None, frame_index) for samples that look the same
+        as the representative frame of their shot. Those frames reuse the faces
+        detected on the representative, which may lie in an earlier batch.
+
+        Args:
+            batch: List of (frame, frame_index) tuples, frame None when skipped
+            faces: BatchFaces of the representative frames of the batch
+            shot_faces: (embeddings, boxes) of the current shot carried over
+                        from the previous batch, or None
+
+        Returns:
+            tuple: (BatchFaces covering every frame of the batch,
+                    (embeddings, boxes) of the shot open at the end of the batch)
+        """
+        rows_by_frame = {
+            frame_idx: np.flatnonzero(faces.owners == position)
+            for position, frame_idx in enumerate(faces.frame_indices)
+        }
+
+        if all(frame is not None for frame, _ in batch):
+            last_rep = batch[-1][1] if batch else None
+            rows = rows_by_frame.get(last_rep, np.empty(0, dtype=int))
+            return faces, (faces.embeddings[rows], faces.boxes[rows])
+
+        frame_indices = []
+        embeddings = []
+        boxes = []
+        owners = []
+        for frame, frame_idx in batch:
+            if frame is not None:
+                rows = rows_by_frame.get(frame_idx, np.empty(0, dtype=int))
+                shot_faces = (faces.embeddings[rows], faces.boxes[rows])
+            if shot_faces is None or len(shot_faces[0]) == 0:
+                continue
+            owners.extend([len(frame_indices)] * len(shot_faces[0]))
+            frame_indices.append(frame_idx)
+            embeddings.append(shot_faces[0])
+            boxes.append(shot_faces[1])
+
+        if not embeddings:
+            return BatchFaces.empty(faces.errors), shot_faces
+        spread = BatchFaces(
+            frame_indices,
+            np.concatenate(embeddings),
+            np.asarray(owners),
+            np.concatenate(boxes),
+            faces.errors,
+        )
+        return spread, shot_faces
+
+    def _frame_distances(self, embeddings, owners, frame_count):
+        """
+        Distance from every frame to every reference in one step.
+
+        Cosine distance is computed with a single matrix product against the
+        pre-normalized reference embeddings. A frame with several faces keeps
+        the closest one per reference.
+
+        Args:
+            embeddings: Face embeddings with shape (faces, embedding_size)
+            owners: Frame position of each face
+            frame_count: Number of frames the faces belong to
+
+        Returns:
+            np.ndarray: Distances with shape (frame_count, references),
+                        inf for frames without faces
+        """
+        distances = np.full(
+            (frame_count, len(self.reference_embeddings)), np.inf, dtype=np.float32
+        )
+        if len(embeddings) == 0:
+            return distances
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        face_distances = 1.0 - (embeddings @ self.reference_embeddings.T) / norms
+        np.minimum.at(distances, owners, face_distances)
+        return distances
+
+    def _match_frames(self, embeddings, owners, frame_count, threshold):
+        """
+        Match every face of a batch against all references in one step.
+
+        Args:
+            embeddings: Face embeddings with shape (faces, embedding_size)
+            owners: Frame position of each face
+            frame_count: Number of frames the faces belong to
+            threshold: Cosine distance threshold
+
+        Returns:
+            np.ndarray: Boolean mask with shape (frame_count, references),
+                        True where a frame contains a face matching a reference
+        """
+        return self._frame_distances(embeddings, owners, frame_count) < threshold
+
+    def _match_dict(self, frame_idx, reference_idx, fps, distance=None):
+        """
+        Build the result dictionary of one matching frame.
+
+        Returns:
+            dict: 'frame_index' and 'timestamp', plus 'label' in gallery mode
+                  and 'distance' when given
+        """
+        match = {
+            "frame_index": int(frame_idx),
+            "timestamp": format_timestamp(frame_idx, fps),
+        }
+        if self.labels is not None:
+            match["label"] = self.labels[reference_idx]
+        if distance is not None:
+            match["distance"] = round(float(distance), 4)
+        return match
+
+    def _frame_matches(self, frame_indices, matched, fps):
+        """
+        Build match dictionaries from a frame/reference match mask.
+
+        Args:
+            frame_indices: Frame index of each mask row
+            matched: Boolean mask with shape (frames, references)
+            fps: Video frames per second
+
+        Returns:
+            list: Match dictionaries in frame order
+        """
+        matches = []
+        for frame_idx, frame_matches in zip(frame_indices, matched):
+            for reference_idx in np.flatnonzero(frame_matches):
+                matches.append(self._match_dict(frame_idx, reference_idx, fps))
+        return matches
+
+    @staticmethod
+    def _check_counts(max_matches, top_k):
+        """Reject match limits below 1, which would return nothing or crash."""
+        for name, value in (("max_matches", max_matches), ("top_k", top_k)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+
+    @staticmethod
+    def _keep_best(best, frame_indices, distances, threshold, top_k):
+        """
+        Push candidate frames into a bounded max-heap of the closest matches.
+
+        Args:
+            best: Heap of (-distance, frame_index, reference_index) entries,
+                  updated in place and never longer than top_k
+            frame_indices: Frame index of each distance row
+            distances: Distances with shape (frames, references)
+            threshold: Cosine distance threshold (None to disable)
+            top_k: Number of matches to keep
+        """
+        candidates = np.isfinite(distances)
+        if threshold is not None:
+            candidates &= distances < threshold
+
+        for row, reference_idx in zip(*np.nonzero(candidates)):
+            entry = (
+                -float(distances[row, reference_idx]),
+                int(frame_indices[row]),
+                int(reference_idx),
+            )
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+
+    def _ranked_matches(self, best, fps):
+        """
+        Turn a heap built by _keep_best into match dictionaries.
+
+        Returns:
+            list: Match dictionaries with 'distance', closest first
+        """
+        return [
+            self._match_dict(frame_idx, reference_idx, fps, distance=-neg_distance)
+            for neg_distance, frame_idx, reference_idx in sorted(best, reverse=True)
+        ]
+
+    def search_embeddings(self, cached, threshold=0.35, max_matches=None, top_k=None):
+        """
+        Find matches among previously stored face embeddings.
+
+        Pure vector math: no frame is decoded and no model is run.
+
+        Args:
+            cached: CachedEmbeddings loaded from an EmbeddingCache
+            threshold: Cosine distance threshold
+            max_matches: Return only the first N matches in frame order
+            top_k: Return only the K closest matches, closest first
+
+        Returns:
+            list: Same format as find_matches
+
+        Raises:
+            ValueError: If max_matches or top_k is below 1
+        """
+        self._check_counts(max_matches, top_k)
+        frame_indices, owners = np.unique(cached.frame_indices, return_inverse=True)
+        if top_k is not None:
+            distances = self._frame_distances(
+                cached.embeddings, owners, len(frame_indices)
+            )
+            best = []
+            self._keep_best(best, frame_indices, distances, threshold, top_k)
+            matches = self._ranked_matches(best, cached.fps)
+        else:
+            matched = self._match_frames(
+                cached.embeddings, owners, len(frame_indices), threshold
+            )
+            matches = self._frame_matches(frame_indices, matched, cached.fps)
+            if max_matches is not None:
+                matches = matches[:max_matches]
+        print(
+            f"Search over {len(cached.embeddings)} cached faces: {len(matches)} matches"
+        )
+        return matches
+
+    def iter_matches(
         self,
         frame_generator,
         threshold=0.35,
         fps=30,
         processable_frames=0,
-        gui_root=None,
+        batched=True,
+        cache_writer=None,
+        cancel_event=None,
+        max_matches=None,
+        top_k=None,
+        tracking=False,
+        batch_planner=None,
     ):
         """
-        Find frames containing faces matching the reference embedding.
+        Recognize frames batch by batch, yielding events as soon as they occur.
 
-        Compares frames using cosine distance. Lower values indicate higher similarity.
+        Streaming counterpart of find_matches: each match is yielded as soon
+        as its batch is recognized, followed by a progress event per batch.
+        With max_matches, extraction and inference stop once that many
+        matches are found. With top_k, only the closest matches are kept and
+        they are yielded once the whole video has been scanned.
 
         Args:
-            frame_generator: Generator yielding batches of (frame, frame_index) tuples
+            frame_generator: Generator yielding batches of (frame, frame_index) tuples.
+                             frame is None for samples that shot detection
+                             found identical to the start of their shot.
+                             Batches with a shot_starts set (FrameBatch) end
+                             face tracks at those frames
             threshold: Cosine distance threshold (0.3-0.4 strict, 0.5-0.6 permissive)
             fps: Video frames per second
-            processable_frames: Total frames to process (for progress tracking)
+            processable_frames: Total frames to process (for progress tracking).
+                                May be an estimate; the reported total is
+                                corrected as frames arrive.
+            batched: Detect faces across each batch and run FaceNet once per batch.
+                     When False, calls DeepFace.represent frame by frame.
+            cache_writer: Optional EmbeddingCacheWriter receiving every detected
+                          face so later searches can skip decoding
+            cancel_event: Optional threading.Event; when set, recognition stops
+                          before the next batch
+            max_matches: Stop after the first N matches (None to scan everything)
+            top_k: Keep only the K lowest-distance matches, returned closest
+                   first with their 'distance' (threshold may be None)
+            tracking: Follow faces across samples by box overlap and reuse
+                      their embeddings instead of running FaceNet again
+                      (batched mode only)
+            batch_planner: Optional BatchPlanner of the extractor, fed the
+                           recognition time of every batch so it can tune
+                           the batch size
 
-        Returns:
-            list: Dictionaries with 'frame_index' and 'timestamp' for each match
+        Yields:
+            dict: {"type": "match", "match": dict} for each match, and
+                  {"type": "progress", "processed": int, "total": int,
+                   "skipped": int, "prefiltered": int, "matches": int}
+                  after each batch.
+                  'processed' counts every sampled frame handled, with or
+                  without faces.
+
+        Raises:
+            RecognitionCancelled: If cancel_event is set during recognition
+            ValueError: If max_matches or top_k is below 1
         """
-        matches = []
+        self._check_counts(max_matches, top_k)
         processed = 0
         skipped = 0
+        match_count = 0
+        best = []
+        shot_faces = None
+        prefilter_checked = 0
+        prefilter_passed = 0
+        tracker = FaceTracker() if tracking and batched else None
 
         print("Starting face recognition...")
         print(f"Using threshold: {threshold} (cosine distance)")
         print(f"Using detector: {self.detector_backend}")
-        for batch in frame_generator:
-            for frame, frame_idx in batch:
-                try:
-                    result = DeepFace.represent(
-                        frame,
-                        model_name=self.model_name,
-                        enforce_detection=True,
-                        detector_backend=self.detector_backend,
+        try:
+            for batch in frame_generator:
+                if cancel_event is not None and cancel_event.is_set():
+                    print(f"Recognition cancelled after {processed} frames")
+                    raise RecognitionCancelled("Recognition cancelled")
+
+                batch_started = time.perf_counter()
+                representatives = [item for item in batch if item[0] is not None]
+                # Cuts found by the extractor's shot detection (see FrameBatch)
+                new_shots = getattr(batch, "shot_starts", ())
+
+                faceless = set()
+                if self.prefilter is not None:
+                    prefilter_checked += len(representatives)
+                    faceless = {
+                        frame_idx
+                        for frame, frame_idx in representatives
+                        if not self.prefilter.has_faces(frame)
+                    }
+                    prefilter_passed += len(representatives) - len(faceless)
+                if batched:
+                    faces = self._represent_batch(
+                        representatives, tracker, faceless, new_shots
+                    )
+                else:
+                    faces = self._represent_frames(
+                        [item for item in representatives if item[1] not in faceless]
                     )
+                faces, shot_faces = self._spread_shot_faces(batch, faces, shot_faces)
 
-                    if isinstance(result, dict):
-                        result = [result]
+                if cache_writer is not None:
+                    cache_writer.add(
+                        faces,
+                        sampled_frames=len(batch),
+                        failed_frames=sum(
+                            not self._is_no_face(e) for e in faces.errors
+                        ),
+                    )
 
-                    frame_has_match = False
+                if top_k is not None:
+                    distances = self._frame_distances(
+                        faces.embeddings, faces.owners, len(faces.frame_indices)
+                    )
+                    self._keep_best(
+                        best, faces.frame_indices, distances, threshold, top_k
+                    )
+                    match_count = len(best)
+                    batch_matches = []
+                else:
+                    matched = self._match_frames(
+                        faces.embeddings,
+                        faces.owners,
+                        len(faces.frame_indices),
+                        threshold,
+                    )
+                    batch_matches = self._frame_matches(
+                        faces.frame_indices, matched, fps
+                    )
+                    if max_matches is not None:
+                        batch_matches = batch_matches[: max_matches - match_count]
 
-                    for face_data in result:
-                        frame_embedding = np.array(face_data["embedding"])
-                        dot_product = np.dot(self.reference_embedding, frame_embedding)
-                        frame_norm = np.linalg.norm(
-                            frame_embedding
-                        )  # Calculate cosine distance
-                        distance = 1.0 - (
-                            dot_product / (self.reference_norm * frame_norm)
-                        )
+                if batch_planner is not None:
+                    batch_planner.record(
+                        len(batch), time.perf_counter() - batch_started
+                    )
+
+                for match in batch_matches:
+                    label = f" - {match['label']}" if "label" in match else ""
+                    print(
+                        f"Match at frame {match['frame_index']} ({match['timestamp']}){label}"
+                    )
+                    match_count += 1
+                    yield {"type": "match", "match": match}
 
-                        if distance < threshold:
-                            frame_has_match = True
-                            break
+                for e in faces.errors:
+                    if skipped == 0:
+                        if not isinstance(e, ValueError):
+                            print(f"--> Error: {e}")
+                        elif "Face could not be detected" not in str(e):
+                            print(f"--> Unexpected error: {e}")
+                    skipped += 1
 
-                    if frame_has_match:
-                        timestamp_seconds = frame_idx / fps
-                        minutes = int(timestamp_seconds // 60)
-                        seconds = int(timestamp_seconds % 60)
+                previous = processed
+                processed += len(batch)
+                if 0 < processable_frames < processed:
+                    # The frame count was an underestimate, keep the total ahead
+                    processable_frames = processed
 
-                        matches.append(
-                            {
-                                "frame_index": frame_idx,
-                                "timestamp": f"{minutes:02d}:{seconds:02d}",
-                            }
+                if processed // 100 > previous // 100:
+                    if processable_frames > 0:
+                        print(
+                            f"Progress: {processed} of {processable_frames} total processable frames | Matches found: {match_count}"
                         )
+                    else:
                         print(
-                            f"Match at frame {frame_idx} ({minutes:02d}:{seconds:02d})"
+                            f"Progress: {processed} frames | Matches found: {match_count}"
                         )
 
-                    processed += 1
+                yield {
+                    "type": "progress",
+                    "processed": processed,
+                    "total": processable_frames,
+                    "skipped": skipped,
+                    "prefiltered": prefilter_checked - prefilter_passed,
+                    "matches": match_count,
+                }
 
-                    if processed % 100 == 0:
-                        if processable_frames > 0:
-                            print(
-                                f"Progress: {processed} of {processable_frames} total processable frames | Matches found: {len(matches)}"
-                            )
-                        else:
-                            print(
-                                f"Progress: {processed} frames | Matches found: {len(matches)}"
-                            )
+                if max_matches is not None and match_count >= max_matches:
+                    print(f"Found {match_count} matches, stopping early")
+                    break
+            else:
+                if 0 < processable_frames != processed:
+                    # Correct an estimated total once the whole video is read
+                    yield {
+                        "type": "progress",
+                        "processed": processed,
+                        "total": processed,
+                        "skipped": skipped,
+                        "prefiltered": prefilter_checked - prefilter_passed,
+                        "matches": match_count,
+                    }
 
-                        if gui_root:
-                            gui_root.update()
+            print(f"Frames without detectable faces: {skipped}")
+            if prefilter_checked > 0:
+                print(
+                    f"Prefilter: {prefilter_passed} of {prefilter_checked} frames sent to "
+                    f"{self.detector_backend} ({100 * prefilter_passed / prefilter_checked:.0f}% hit rate)"
+                )
 
-                except ValueError as e:
-                    if "Face could not be detected" not in str(e):
-                        if skipped == 0:
-                            print(f"--> Unexpected error: {e}")
-                    skipped += 1
+            if tracker is not None and tracker.embedded + tracker.reused > 0:
+                print(
+                    f"Tracking: reused {tracker.reused} of "
+                    f"{tracker.embedded + tracker.reused} face embeddings"
+                )
 
-                except Exception as e:
-                    if skipped == 0:
-                        print(f"--> Error: {e}")
-                    skipped += 1
+            for match in self._ranked_matches(best, fps):
+                yield {"type": "match", "match": match}
+        finally:
+            if hasattr(frame_generator, "close"):
+                frame_generator.close()
+
+    def find_matches(
+        self,
+        frame_generator,
+        threshold=0.35,
+        fps=30,
+        processable_frames=0,
+        gui_root=None,
+        batched=True,
+        cache_writer=None,
+        progress_callback=None,
+        cancel_event=None,
+        max_matches=None,
+        top_k=None,
+        tracking=False,
+        batch_planner=None,
+    ):
+        """
+        Find frames containing faces matching the reference embedding.
+
+        Compares frames using cosine distance. Lower values indicate higher similarity.
+        In gallery mode every frame is compared against all references at once.
+
+        Args:
+            frame_generator: Generator yielding batches of (frame, frame_index) tuples
+            threshold: Cosine distance threshold (0.3-0.4 strict, 0.5-0.6 permissive)
+            fps: Video frames per second
+            processable_frames: Total frames to process (for progress tracking)
+            batched: Detect faces across each batch and run FaceNet once per batch.
+                     When False, calls DeepFace.represent frame by frame.
+            cache_writer: Optional EmbeddingCacheWriter receiving every detected
+                          face so later searches can skip decoding
+            progress_callback: Optional callable(processed, processable_frames,
+                               matches) invoked after every batch
+            cancel_event: Optional threading.Event; when set, recognition stops
+                          before the next batch
+            max_matches: Stop after the first N matches (None to scan everything)
+            top_k: Keep only the K lowest-distance matches, returned closest
+                   first with their 'distance' (threshold may be None)
+            tracking: Follow faces across samples by box overlap and reuse
+                      their embeddings instead of running FaceNet again
+                      (batched mode only)
+            batch_planner: Optional BatchPlanner of the extractor, fed the
+                           recognition time of every batch so it can tune
+                           the batch size
+
+        Returns:
+            list: Dictionaries with 'frame_index' and 'timestamp' for each match,
+                  plus 'label' in gallery mode
+
+        Raises:
+            RecognitionCancelled: If cancel_event is set during recognition
+            ValueError: If max_matches or top_k is below 1
+        """
+        matches = []
+
+        for event in self.iter_matches(
+            frame_generator,
+            threshold=threshold,
+            fps=fps,
+            processable_frames=processable_frames,
+            batched=batched,
+            cache_writer=cache_writer,
+            cancel_event=cancel_event,
+            max_matches=max_matches,
+            top_k=top_k,
+            tracking=tracking,
+            batch_planner=batch_planner,
+        ):
+            if event["type"] == "match":
+                matches.append(event["match"])
+                continue
+
+            if gui_root:
+                gui_root.update()
+            if progress_callback:
+                progress_callback(event["processed"], event["total"], matches)
 
         print("=" * 60)
         print(f"Recognition complete: {len(matches)} matches")
         for match in matches:
-            print(f"Match at frame {match['frame_index']} ({match['timestamp']})")
+            label = f" - {match['label']}" if "label" in match else ""
+            print(
+                f"Match at frame {match['frame_index']} ({match['timestamp']}){label}"
+            )
         print("=" * 60)
 
         return matches
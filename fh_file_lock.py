@@ -0,0 +1,36 @@
+try:
+    import fcntl
+except ImportError:  # Windows: locking is a no-op
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory lock on a file, held across processes.
+
+    Used as a context manager around reads and writes of on-disk stores that
+    several jobs update. Shared locks let readers in together, an exclusive
+    lock waits until every other holder is gone.
+    """
+
+    def __init__(self, path, exclusive=True):
+        """
+        Args:
+            path: Lock file (created if missing)
+            exclusive: Take an exclusive lock instead of a shared one
+        """
+        self.path = path
+        self.exclusive = exclusive
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a")
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH
+            fcntl.flock(self._file.fileno(), flags)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        self._file = None
+        return False
@@ -1,23 +1,152 @@
 import cv2
+import json
+import numpy as np
 import os
+import queue
+import shutil
+import subprocess
+import threading
+from fh_batch_planner import BatchPlanner
+from fh_stream import is_pipe, is_stream_url
+
+# Containers whose index lets OpenCV/FFmpeg seek to an exact frame
+SEEKABLE_CONTAINERS = (".mp4", ".m4v", ".mov", ".mkv", ".webm")
+
+# Seeking decodes from the previous keyframe, so it only pays off when samples
+# are further apart than a typical GOP (2-5 seconds in web video)
+SEEK_MIN_INTERVAL_SECONDS = 5.0
+
+# Adaptive sampling (coarse pass, dense refinement) in seconds per mode
+ADAPTIVE_INTERVAL_SECONDS = {
+    "Balanced": (5.0, 0.5),
+    "High Precision": (2.0, 0.25),
+}
+
+# Named regions of interest as (x, y, width, height) fractions of the frame
+ROI_PRESETS = {
+    "full": None,
+    "left": (0.0, 0.0, 0.5, 1.0),
+    "right": (0.5, 0.0, 0.5, 1.0),
+    "top": (0.0, 0.0, 1.0, 0.5),
+    "bottom": (0.0, 0.5, 1.0, 0.5),
+    "center": (0.25, 0.25, 0.5, 0.5),
+}
+
+# Mean absolute difference (0-255) of downscaled grayscale frames above which
+# a sample starts a new shot
+SHOT_CHANGE_THRESHOLD = 12.0
+
+# Samples per shot after which a new representative frame is analyzed anyway,
+# so slow camera moves or people turning inside a long shot are not missed
+MAX_SHOT_SAMPLES = 10
+
+
+class FrameBufferPool:
+    """
+    Ring of preallocated frame batches reused across an extraction.
+
+    Frames are converted straight into the pool with cvtColor(dst=...), so
+    steady-state extraction allocates no new frame arrays. A slot is written
+    again only after every other slot has been handed out, so consumers must
+    be done with a batch (or copy its frames) by the time that many newer
+    batches have been extracted.
+    """
+
+    def __init__(self, frame_shape, batch_size, slot_count):
+        """
+        Args:
+            frame_shape: (height, width, 3) of the RGB frames
+            batch_size: Frames per slot
+            slot_count: Batches that may be alive at the same time
+        """
+        self.frame_shape = frame_shape
+        self.batch_size = batch_size
+        self.slots = [None] * slot_count
+        self.slot = 0
+        self.position = 0
+
+    def next_frame(self, frame_shape):
+        """
+        Buffer for the next frame of the current batch.
+
+        Slots are allocated on first use, so short videos never allocate the
+        whole ring.
+
+        Returns:
+            np.ndarray or None: Buffer, or None if frame_shape does not match
+                                the pool or the current batch is full
+        """
+        if frame_shape != self.frame_shape or self.position >= self.batch_size:
+            return None
+        if self.slots[self.slot] is None:
+            self.slots[self.slot] = np.empty(
+                (self.batch_size,) + self.frame_shape, dtype=np.uint8
+            )
+        buffer = self.slots[self.slot][self.position]
+        self.position += 1
+        return buffer
+
+    def next_batch(self):
+        """Move on to the next slot of the ring."""
+        self.slot = (self.slot + 1) % len(self.slots)
+        self.position = 0
+
+
+class FrameBatch(list):
+    """
+    Batch of (frame, frame_index) tuples yielded by the extractor.
+
+    shot_starts holds the frame indices where shot detection saw a cut. The
+    periodic re-analysis of a long shot (MAX_SHOT_SAMPLES) is not a cut, so
+    face tracks continue through it and end only at real shot boundaries.
+    """
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self.shot_starts = set()
 
 
 class VideoFrameExtractor:
     """Extracts and preprocesses video frames for face recognition."""
 
-    def __init__(self, video_path):
+    def __init__(
+        self, video_path, start_frame=0, end_frame=None, metadata=None, frame_offset=0
+    ):
         """
         Initialize frame extractor.
 
         Args:
-            video_path: Path to video file
+            video_path: Path to video file, named pipe or HTTP(S) media URL
+            start_frame: First frame of the segment to extract
+            end_frame: Frame where the segment ends (exclusive). None reads to
+                       the end of the video.
+            metadata: Optional dict with 'fps' and 'duration' (seconds) from
+                      the video's source (see fh_metadata.video_properties),
+                      used where the container does not report them
+            frame_offset: Frame of the full video where the file starts, for
+                          files holding only a section of it. Frame indices
+                          (start_frame, end_frame, yielded frames) always
+                          refer to the full video.
         """
         self.video_path = video_path
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.metadata = metadata or {}
+        self.frame_offset = frame_offset
         self.video_capture = None
         self.frame_interval = None
         self.fps = None
         self.total_frames = 0
+        self.frame_count_estimated = False
+        self.width = 0
+        self.height = 0
+        self.roi = None
         self.total_processable_frames = 0
+        self.sampling = "auto"
+        self.shot_detection = False
+        self.shot_threshold = SHOT_CHANGE_THRESHOLD
+        self.batch_planner = BatchPlanner()
+        self.buffer_slots = 2
 
     def open_video(self):
         """
@@ -26,7 +155,9 @@ class VideoFrameExtractor:
             tuple: (success: bool, error_message: str or None)
         """
         try:
-            if not os.path.exists(self.video_path):
+            if not is_stream_url(self.video_path) and not os.path.exists(
+                self.video_path
+            ):
                 return False, "Video file not found"
 
             self.video_capture = cv2.VideoCapture(self.video_path)
@@ -35,28 +166,166 @@ class VideoFrameExtractor:
 
             self.fps = self.video_capture.get(cv2.CAP_PROP_FPS)
             if not self.fps or self.fps <= 0:
-                self.fps = 30
+                self.fps = self.metadata.get("fps") or 30
 
             self.total_frames = int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
-
-            if self.total_frames <= 0:
-                print("CAP_PROP_FRAME_COUNT failed, counting frames manually")
-                temp_capture = cv2.VideoCapture(self.video_path)
-                self.total_frames = 0
-                while temp_capture.isOpened():
-                    ret, frame = temp_capture.read()
-                    if not ret:
-                        break
-                    self.total_frames += 1
-                temp_capture.release()
-
-            print(f"Total frames: {self.total_frames}")
+            self.width = int(self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+            if self.total_frames <= 0 and self.metadata.get("duration"):
+                self.total_frames = int(round(self.metadata["duration"] * self.fps))
+                self.frame_count_estimated = True
+            elif self.total_frames <= 0:
+                print("CAP_PROP_FRAME_COUNT failed, reading container metadata")
+                self.total_frames, exact = self._probe_frame_count()
+                self.frame_count_estimated = self.total_frames > 0 and not exact
+
+            if self.total_frames > 0:
+                self.total_frames += self.frame_offset
+
+            if self.frame_count_estimated:
+                print(f"Total frames: ~{self.total_frames} (estimated)")
+            elif self.total_frames > 0:
+                print(f"Total frames: {self.total_frames}")
+            else:
+                print("Total frames: unknown, counted during extraction")
             return True, None
 
         except Exception as e:
             print(f"Error opening video: {e}")
             return False, str(e)
 
+    def _probe_frame_count(self):
+        """
+        Read the frame count from container metadata with ffprobe.
+
+        Uses the frame count stored in the stream header when the container
+        has one, otherwise estimates it from the duration and fps. Nothing is
+        decoded.
+
+        Returns:
+            tuple: (frame_count: int, exact: bool), (0, False) if unknown
+        """
+        if is_pipe(self.video_path):
+            # ffprobe would consume the data the extractor needs
+            return 0, False
+        if shutil.which("ffprobe") is None:
+            print("ffprobe not available, frame count unknown")
+            return 0, False
+
+        try:
+            result = subprocess.run(
+                [
+                    "ffprobe",
+                    "-v",
+                    "error",
+                    "-select_streams",
+                    "v:0",
+                    "-show_entries",
+                    "stream=nb_frames,duration:format=duration",
+                    "-of",
+                    "json",
+                    self.video_path,
+                ],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+            metadata = json.loads(result.stdout or "{}")
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            print(f"Could not read video metadata: {e}")
+            return 0, False
+
+        streams = metadata.get("streams") or [{}]
+        try:
+            frame_count = int(streams[0].get("nb_frames", 0))
+        except ValueError:
+            frame_count = 0
+        if frame_count > 0:
+            return frame_count, True
+
+        for duration in (
+            streams[0].get("duration"),
+            metadata.get("format", {}).get("duration"),
+        ):
+            try:
+                seconds = float(duration)
+            except (TypeError, ValueError):
+                continue
+            if seconds > 0:
+                return int(round(seconds * self.fps)), False
+        return 0, False
+
+    def set_frame_offset(self, frame_offset):
+        """
+        Change where the file starts in the full video, after open_video.
+
+        Args:
+            frame_offset: Frame of the full video where the file starts
+        """
+        if self.total_frames > 0:
+            self.total_frames += frame_offset - self.frame_offset
+        self.frame_offset = frame_offset
+
+    @property
+    def known_frame_count(self):
+        """Frame count if exact, 0 if unknown or only estimated."""
+        return 0 if self.frame_count_estimated else self.total_frames
+
+    def set_time_range(self, start_seconds=None, end_seconds=None):
+        """
+        Restrict extraction to a time range of the video.
+
+        Extraction seeks straight to the start of the range instead of
+        decoding from the first frame. Call after open_video.
+
+        Args:
+            start_seconds: Start of the range (None for the beginning)
+            end_seconds: End of the range, exclusive (None for the end)
+
+        Returns:
+            tuple: (success: bool, error_message: str or None)
+        """
+        start_frame = int(round((start_seconds or 0) * self.fps))
+        end_frame = None
+        if end_seconds is not None:
+            end_frame = int(round(end_seconds * self.fps))
+            if end_frame <= start_frame:
+                return False, "The end time must be after the start time"
+
+        if start_frame < 0:
+            return False, "The start time cannot be negative"
+        if self.known_frame_count > 0:
+            if start_frame >= self.total_frames:
+                return False, "The start time is beyond the end of the video"
+            if end_frame is not None:
+                end_frame = min(end_frame, self.total_frames)
+
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        return True, None
+
+    def region_pixels(self, frame_width=None, frame_height=None):
+        """
+        Region of interest in pixels.
+
+        Args:
+            frame_width: Frame width (defaults to the video width)
+            frame_height: Frame height (defaults to the video height)
+
+        Returns:
+            tuple or None: (x0, y0, x1, y1), or None for the whole frame
+        """
+        if self.roi is None:
+            return None
+        width = frame_width or self.width
+        height = frame_height or self.height
+        x, y, w, h = self.roi
+        x0, y0 = int(x * width), int(y * height)
+        x1 = max(x0 + 1, int(round((x + w) * width)))
+        y1 = max(y0 + 1, int(round((y + h) * height)))
+        return x0, y0, min(x1, width), min(y1, height)
+
     def determine_interval(self, mode="Balanced"):
         """
         Calculate frame sampling interval.
@@ -77,36 +346,222 @@ class VideoFrameExtractor:
 
         return self.frame_interval
 
-    def _is_large_video(self):
+    def determine_adaptive_intervals(self, mode="Balanced"):
         """
-        Check if video requires batch processing (>100MB or >30min).
+        Calculate the coarse and fine intervals of adaptive sampling.
+
+        The coarse interval is a multiple of the fine one, so every coarse
+        sample also lies on the fine sampling grid.
+
+        Args:
+            mode (str): Processing mode. Options: "High Precision", "Balanced".
 
         Returns:
-            bool: True if video is large
+            tuple: (coarse_interval, fine_interval) in frames, both at least 1
         """
-        try:
-            if os.path.getsize(self.video_path) > 100 * 1024 * 1024:  # 100MB
-                return True
+        coarse_seconds, fine_seconds = ADAPTIVE_INTERVAL_SECONDS.get(
+            mode, ADAPTIVE_INTERVAL_SECONDS["Balanced"]
+        )
+        fine_interval = max(1, round(self.fps * fine_seconds))
+        coarse_interval = fine_interval * max(1, round(coarse_seconds / fine_seconds))
+        return coarse_interval, fine_interval
+
+    def _seek_is_accurate(self):
+        """
+        Probe whether frame-accurate seeking works for this video.
 
-            if self.total_frames <= 0:
+        Returns:
+            bool: True if seeking lands on the requested frame
+        """
+        target = min(
+            self.frame_interval, max(self.total_frames - self.frame_offset - 1, 0)
+        )
+        try:
+            if not self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, target):
                 return False
+            landed = int(self.video_capture.get(cv2.CAP_PROP_POS_FRAMES))
+            return landed == target
+        finally:
+            self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
-            duration_minutes = self.total_frames / self.fps / 60
-            return duration_minutes > 30
+    def choose_sampling_strategy(self):
+        """
+        Choose how skipped frames are stepped over.
 
-        except (OSError, ZeroDivisionError) as e:
-            print(f"Could not determine video size/duration: {e}")
-            return False
+        - 'seek': Jump straight to each sampled frame. Skipped frames are never
+                  decoded. Used for sparse intervals on indexed containers.
+        - 'grab': Decode every frame with grab() but only retrieve() and convert
+                  the sampled ones. Cheaper than seeking for dense intervals.
+
+        Returns:
+            str: 'seek' or 'grab'
+        """
+        if self.sampling in ("seek", "grab"):
+            return self.sampling
+
+        interval_seconds = self.frame_interval / self.fps
+        if (
+            interval_seconds >= SEEK_MIN_INTERVAL_SECONDS
+            and self.total_frames > 0
+            and self.video_path.lower().endswith(SEEKABLE_CONTAINERS)
+            and self._seek_is_accurate()
+        ):
+            return "seek"
+        return "grab"
+
+    def _first_sampled_frame(self):
+        """
+        First frame of the segment on the global sampling grid.
+
+        Samples stay aligned to multiples of frame_interval so segments
+        extracted separately produce the same frames as one full pass.
+
+        Returns:
+            int: Frame index of the first sample
+        """
+        start = max(self.start_frame, self.frame_offset)
+        return -(-start // self.frame_interval) * self.frame_interval
+
+    def _segment_stop(self, estimate=False):
+        """
+        Frame where extraction stops (exclusive), or None if unknown.
+
+        An estimated frame count never stops extraction, since the video may
+        be longer than estimated.
+
+        Args:
+            estimate: Also use an estimated frame count (for progress only)
+
+        Returns:
+            int or None: End of the segment clamped to the video length
+        """
+        total_frames = self.total_frames if estimate else self.known_frame_count
+        stops = [stop for stop in (self.end_frame, total_frames) if stop and stop > 0]
+        return min(stops) if stops else None
+
+    def _count_processable_frames(self):
+        """
+        Count the sampled frames of the segment.
+
+        Returns:
+            int: Number of frames extract_frames will yield, estimated if the
+                 frame count is (0 if unknown)
+        """
+        stop = self._segment_stop(estimate=True)
+        if stop is None:
+            return 0
+        return len(range(self._first_sampled_frame(), stop, self.frame_interval))
+
+    def _seek_to(self, frame_index):
+        """
+        Seek to a frame, verifying the capture landed on it.
+
+        Args:
+            frame_index: Frame of the full video (see frame_offset)
+
+        Returns:
+            int: Position of the capture in the full video (frame_index, or
+                 frame_offset if seeking failed)
+        """
+        position = frame_index - self.frame_offset
+        if self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, position):
+            if int(self.video_capture.get(cv2.CAP_PROP_POS_FRAMES)) == position:
+                return frame_index
+        self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.frame_offset
+
+    def _read_sampled_frames(self, strategy):
+        """
+        Read only the sampled frames of the segment, in BGR as decoded.
+
+        Args:
+            strategy: 'seek' or 'grab' (see choose_sampling_strategy)
+
+        Yields:
+            tuple: (bgr_frame, frame_index)
+        """
+        first = self._first_sampled_frame()
+        stop = self._segment_stop()
+        frame_index = (
+            self._seek_to(first) if first > self.frame_offset else self.frame_offset
+        )
+
+        if strategy == "seek":
+            while stop is None or frame_index < stop:
+                if frame_index > first and not self.video_capture.set(
+                    cv2.CAP_PROP_POS_FRAMES, frame_index - self.frame_offset
+                ):
+                    print("Seeking failed, continuing with sequential grab")
+                    frame_index = self.frame_offset + int(
+                        self.video_capture.get(cv2.CAP_PROP_POS_FRAMES)
+                    )
+                    break
+                ret, frame = self.video_capture.read()
+                if not ret:
+                    return
+                yield frame, frame_index
+                frame_index += self.frame_interval
+            else:
+                return
+
+        while (stop is None or frame_index < stop) and self.video_capture.grab():
+            if frame_index >= first and frame_index % self.frame_interval == 0:
+                ret, frame = self.video_capture.retrieve()
+                if not ret:
+                    return
+                yield frame, frame_index
+            frame_index += 1
+
+        if stop is None:
+            # Every frame up to the end was grabbed, so the count is exact now
+            self.total_frames = frame_index
+            self.frame_count_estimated = False
+
+    @staticmethod
+    def _shot_signature(frame):
+        """
+        Tiny grayscale thumbnail used to compare samples cheaply.
+
+        Returns:
+            np.ndarray: 32x32 grayscale image
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+
+    def _same_shot(self, signature, shot_signature):
+        """
+        Check whether a sample looks the same as its shot's representative.
+
+        Returns:
+            bool: True if the mean pixel difference is below shot_threshold
+        """
+        difference = cv2.norm(signature, shot_signature, cv2.NORM_L1)
+        return difference / signature.size < self.shot_threshold
 
     def extract_frames(self):
         """
         Extract and preprocess frames for FaceNet model.
 
-        Automatically uses batch mode (100 frames per batch) for large videos,
-        or single batch mode for smaller videos. Converts frames to RGB.
+        Converts frames to RGB and yields them in batches sized by
+        batch_planner from the frame size and the memory budget, and tuned
+        to recognition throughput if the planner is fed timings. Frames are
+        written into a FrameBufferPool of buffer_slots
+        batches: a yielded batch is overwritten once buffer_slots newer
+        batches have been yielded, so consumers that keep frames must copy
+        them. Skipped frames are never retrieved or converted (see
+        choose_sampling_strategy).
+
+        With a region of interest (roi, fractions of the frame), frames are
+        cropped to it before anything else runs.
+
+        With shot_detection enabled, a sample that looks the same as the first
+        sample of its shot is yielded as (None, frame_index) without RGB
+        conversion, and FaceRecognizer reuses the faces of the shot's
+        representative frame for it. The frames where a new shot starts are
+        listed in the batch's shot_starts.
 
         Yields:
-            list: Batch of tuples (preprocessed_frame, frame_index)
+            FrameBatch: Batch of tuples (preprocessed_frame, frame_index)
 
         Raises:
             RuntimeError: If video or frame interval not initialized
@@ -114,41 +569,73 @@ class VideoFrameExtractor:
         if self.video_capture is None or self.frame_interval is None:
             raise RuntimeError("Video or frame interval not initialized")
         try:
-            use_batch = self._is_large_video()
-            batch_size = 100
+            strategy = self.choose_sampling_strategy()
+            print(f"Extracting frames for FaceNet ({strategy})...")
 
-            if use_batch:
-                print("Extracting frames for FaceNet in batch mode...")
-            else:
-                print("Extracting frames for FaceNet...")
-
-            buffer = []
+            pool = None
+            buffer = FrameBatch()
             processed_count = 0
-            frame_index = 0
+            representative_count = 0
+            shot_signature = None
+            shot_samples = 0
+
+            for frame, frame_index in self._read_sampled_frames(strategy):
+                processed_count += 1
+
+                if self.roi is not None:
+                    x0, y0, x1, y1 = self.region_pixels(frame.shape[1], frame.shape[0])
+                    frame = frame[y0:y1, x0:x1]
+
+                same_shot = False
+                if self.shot_detection:
+                    signature = self._shot_signature(frame)
+                    looks_same = shot_signature is not None and self._same_shot(
+                        signature, shot_signature
+                    )
+                    same_shot = looks_same and shot_samples < MAX_SHOT_SAMPLES
+                    if same_shot:
+                        shot_samples += 1
+                    else:
+                        if not looks_same:
+                            buffer.shot_starts.add(frame_index)
+                        shot_signature = signature
+                        shot_samples = 1
+
+                if same_shot:
+                    buffer.append((None, frame_index))
+                else:
+                    if pool is None:
+                        pool = FrameBufferPool(
+                            frame.shape,
+                            self.batch_planner.plan(frame.shape, self.buffer_slots),
+                            self.buffer_slots,
+                        )
+                    target = pool.next_frame(frame.shape)
+                    if target is None:
+                        # Frame size changed mid-stream, fall back to a new array
+                        processed_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    else:
+                        processed_frame = cv2.cvtColor(
+                            frame, cv2.COLOR_BGR2RGB, dst=target
+                        )
+                    buffer.append((processed_frame, frame_index))
+                    representative_count += 1
 
-            while True:
-                ret, frame = self.video_capture.read()
-                if not ret:
-                    break
+                if processed_count > self.total_processable_frames > 0:
+                    # The frame count was underestimated, keep the estimate ahead
+                    self.total_processable_frames = processed_count
 
-                if frame_index % self.frame_interval == 0:
-                    processed_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    buffer.append((processed_frame, frame_index))
-                    processed_count += 1
-
-                    if processed_count % 50 == 0 and self.total_processable_frames > 0:
-                        percentage = (
-                            processed_count / self.total_processable_frames
-                        ) * 100
-                        print(
-                            f"Extracting frames... {processed_count}/{self.total_processable_frames} ({percentage:.0f}%)"
-                        )
+                if processed_count % 50 == 0 and self.total_processable_frames > 0:
+                    percentage = (processed_count / self.total_processable_frames) * 100
+                    print(
+                        f"Extracting frames... {processed_count}/{self.total_processable_frames} ({percentage:.0f}%)"
+                    )
 
-                    if use_batch and len(buffer) >= batch_size:
-                        yield buffer
-                        buffer = []
+                if pool is not None and len(buffer) >= self.batch_planner.batch_size:
+                    yield buffer
+                    buffer = FrameBatch()
+                    pool.next_batch()
 
-                frame_index += 1
             if buffer:
                 yield buffer
 
@@ -156,14 +643,82 @@ class VideoFrameExtractor:
                 raise RuntimeError("No frames extracted")
             else:
                 print(f"Extraction complete: {processed_count} frames")
+                self.total_processable_frames = processed_count
+                if self.shot_detection:
+                    print(
+                        f"Shot detection: {representative_count} of {processed_count} frames analyzed"
+                    )
 
         finally:
             self.release_video()
 
-    def process_video(self):
+    @staticmethod
+    def prefetch_batches(generator, queue_depth=2):
+        """
+        Run a batch generator in a background thread.
+
+        Decoding and RGB conversion overlap with whatever the consumer does
+        with the previous batch (face recognition). At most queue_depth batches
+        wait in memory, plus the one being decoded.
+
+        Args:
+            generator: Generator yielding frame batches
+            queue_depth: Maximum number of decoded batches waiting in the queue
+
+        Yields:
+            list: Batches from the wrapped generator, in order
+
+        Raises:
+            Exception: Any error raised by the wrapped generator
+        """
+        batches = queue.Queue(maxsize=max(1, queue_depth))
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for batch in generator:
+                    if not put(("batch", batch)):
+                        break
+                else:
+                    put(("done", None))
+            except Exception as e:
+                put(("error", e))
+            finally:
+                generator.close()
+
+        worker = threading.Thread(target=produce, name="frame-decoder", daemon=True)
+        worker.start()
+        try:
+            while True:
+                kind, payload = batches.get()
+                if kind == "done":
+                    break
+                if kind == "error":
+                    raise payload
+                yield payload
+        finally:
+            stop.set()
+            worker.join()
+
+    def process_video(self, pipelined=False, queue_depth=2):
         """
         Start frame extraction process with validation.
 
+        Args:
+            pipelined (bool): Decode frames in a background thread so decoding
+                              overlaps with recognition.
+            queue_depth (int): Decoded batches buffered ahead of the consumer
+                               in pipelined mode.
+
         Returns:
             tuple: (success: bool, generator or error_message: str)
         """
@@ -171,8 +726,14 @@ class VideoFrameExtractor:
             if self.frame_interval is None or self.frame_interval <= 0:
                 raise RuntimeError("Frame interval not initialized.")
 
-            gen = self.extract_frames()
-            self.total_processable_frames = self.total_frames // self.frame_interval
+            if pipelined:
+                # Batches waiting in the queue, the one being recognized and
+                # the one being decoded all need their own buffers
+                self.buffer_slots = max(1, queue_depth) + 2
+                gen = self.prefetch_batches(self.extract_frames(), queue_depth)
+            else:
+                gen = self.extract_frames()
+            self.total_processable_frames = self._count_processable_frames()
             return True, gen
         except Exception as e:
             self.release_video()
@@ -3,7 +3,7 @@ from tkinter import filedialog, messagebox
 from tkinter import ttk
 import os
 from fh_downloader import VideoDownloader
-from fh_frame_extractor import VideoFrameExtractor
+from fh_frame_extractor import ROI_PRESETS, VideoFrameExtractor
 from fh_face_recognizer import FaceRecognizer
 from fh_core import FaceHuntCore
 
@@ -24,7 +24,7 @@ class FaceHuntInputSelection:
         """
         self.root = root
         self.root.title("FaceHunt - Input Selection")
-        self.root.geometry("800x500")
+        self.root.geometry("800x600")
 
         self.core = FaceHuntCore()
 
@@ -48,6 +48,9 @@ class FaceHuntInputSelection:
         self.progress_container = None
         self.mode_var = None
         self.mode_selector = None
+        self.start_time_var = None
+        self.end_time_var = None
+        self.region_var = None
         self.step1_label = None
         self.step2_label = None
         self.step3_label = None
@@ -195,7 +198,9 @@ class FaceHuntInputSelection:
 
     def start_download(self):
         """Download YouTube video and proceed to frame extraction."""
-        downloader = VideoDownloader(self.youtube_url_to_download)
+        downloader = VideoDownloader(
+            self.youtube_url_to_download, metadata=self.core.metadata
+        )
         self.video_path = downloader.download()
         if self.video_path:
             messagebox.showinfo(
@@ -228,6 +233,28 @@ class FaceHuntInputSelection:
         )
         self.mode_selector.pack(pady=10)
 
+        range_frame = tk.Frame(self.root)
+        range_frame.pack(pady=5)
+        tk.Label(range_frame, text="From (MM:SS):").pack(side="left")
+        self.start_time_var = tk.StringVar(value="")
+        tk.Entry(range_frame, textvariable=self.start_time_var, width=8).pack(
+            side="left", padx=5
+        )
+        tk.Label(range_frame, text="To (MM:SS):").pack(side="left")
+        self.end_time_var = tk.StringVar(value="")
+        tk.Entry(range_frame, textvariable=self.end_time_var, width=8).pack(
+            side="left", padx=5
+        )
+
+        tk.Label(self.root, text="Search region:").pack(pady=5)
+        self.region_var = tk.StringVar(value="full")
+        ttk.Combobox(
+            self.root,
+            textvariable=self.region_var,
+            values=list(ROI_PRESETS),
+            state="readonly",
+        ).pack(pady=5)
+
         self.recognize_button = tk.Button(
             self.root, text="Start Recognition", command=self.start_extraction
         )
@@ -255,6 +282,20 @@ class FaceHuntInputSelection:
 
     def start_extraction(self):
         """Start frame extraction with selected mode."""
+        try:
+            start_time = self.core.parse_time(self.start_time_var.get())
+            end_time = self.core.parse_time(self.end_time_var.get())
+            roi = self.core.parse_roi(self.region_var.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        success, message = self.frame_extractor.set_time_range(start_time, end_time)
+        if not success:
+            messagebox.showerror("Error", message)
+            return
+        self.frame_extractor.roi = roi
+
         self.recognize_button.config(state="disabled")
         mode = self.mode_var.get()
 
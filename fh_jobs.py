@@ -0,0 +1,248 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """A recognition job running in the background, with live progress."""
+
+    def __init__(self):
+        """Create a queued job with a random ID."""
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.message = "Waiting for a free worker."
+        self.processed = 0
+        self.total = 0
+        self.matches = []
+        self.appearances = []
+        self.result = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.events = []
+        self._seen_matches = set()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        """True once the job completed, failed or was cancelled."""
+        return self.status in ("completed", "failed", "cancelled")
+
+    def update_progress(self, processed, total, matches):
+        """
+        Record recognition progress. Called from the worker thread.
+
+        Matches not seen before are appended to the event log, followed by a
+        progress event, so streaming clients receive each match once.
+
+        Args:
+            processed: Frames processed so far
+            total: Total processable frames (0 if unknown)
+            matches: Matches found so far
+        """
+        with self._lock:
+            self.processed = processed
+            self.total = total
+            self.matches = list(matches)
+
+            for match in self.matches:
+                key = (match["frame_index"], match.get("label"))
+                if key not in self._seen_matches:
+                    self._seen_matches.add(key)
+                    self.events.append({"type": "match", "match": match})
+            self.events.append(
+                {
+                    "type": "progress",
+                    "processed": processed,
+                    "total": total,
+                    "matches": len(self.matches),
+                }
+            )
+
+    def start(self):
+        """
+        Mark the job as running, unless it was cancelled while queued.
+
+        Returns:
+            bool: False if the job was cancelled and must not run
+        """
+        with self._lock:
+            if self.cancel_event.is_set():
+                return False
+            self.status = "running"
+            self.message = "Processing video..."
+            return True
+
+    def finish(self, status, message, **fields):
+        """
+        Record the outcome of the job in one step.
+
+        Args:
+            status: 'completed', 'failed' or 'cancelled'
+            message: Final message
+            **fields: Other attributes to set (result, matches, appearances)
+        """
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.status = status
+            self.message = message
+            self.finished_at = time.time()
+
+    def request_cancel(self):
+        """
+        Ask a queued or running job to stop.
+
+        Returns:
+            bool: False if the job had already finished
+        """
+        with self._lock:
+            if self.finished:
+                return False
+            self.cancel_event.set()
+            self.message = "Cancelling..."
+            return True
+
+    def events_since(self, position):
+        """
+        Events appended after a position in the event log.
+
+        Args:
+            position: Number of events the caller has already received
+
+        Returns:
+            list: New events, oldest first
+        """
+        with self._lock:
+            return self.events[position:]
+
+    def to_dict(self, include_matches=True):
+        """
+        Snapshot of the job for the status endpoint.
+
+        Returns:
+            dict: Status, message, progress and matches so far
+        """
+        with self._lock:
+            snapshot = {
+                "job_id": self.id,
+                "status": self.status,
+                "message": self.message,
+                "progress": {
+                    "processed_frames": self.processed,
+                    "total_processable_frames": self.total,
+                    "percentage": (
+                        round(100 * self.processed / self.total, 1)
+                        if self.total > 0
+                        else None
+                    ),
+                },
+                "matches_found": len(self.matches),
+            }
+            if include_matches:
+                snapshot["matches"] = list(self.matches)
+                snapshot["appearances"] = list(self.appearances)
+            return snapshot
+
+
+class JobManager:
+    """Runs recognition jobs on a bounded worker pool."""
+
+    def __init__(self, max_workers=2, retention_seconds=3600):
+        """
+        Args:
+            max_workers: Jobs processed at the same time; the rest wait queued
+            retention_seconds: How long finished jobs stay queryable
+        """
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="facehunt-job"
+        )
+        self.retention_seconds = retention_seconds
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, work, cleanup=None):
+        """
+        Queue a job.
+
+        Args:
+            work: Callable taking the Job and returning a workflow result dict
+                  ({"success": bool, "message": str, "matches": list | None})
+            cleanup: Optional callable run after the job finishes, whatever
+                     the outcome (e.g. removing temporary files)
+
+        Returns:
+            Job: The queued job
+        """
+        self._prune()
+        job = Job()
+        with self._lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, work, cleanup)
+        return job
+
+    def _run(self, job, work, cleanup):
+        """Execute a job in a worker thread and record its outcome."""
+        try:
+            if not job.start():
+                job.finish("cancelled", "Processing cancelled.")
+                return
+
+            result = work(job)
+
+            if job.cancel_event.is_set():
+                job.finish("cancelled", result["message"], result=result)
+            elif result["success"]:
+                job.finish(
+                    "completed",
+                    result["message"],
+                    result=result,
+                    matches=result["matches"],
+                    appearances=result.get("appearances", []),
+                )
+            else:
+                job.finish("failed", result["message"], result=result)
+
+        except Exception as e:
+            traceback.print_exc()
+            job.finish("failed", f"An unexpected internal error occurred: {str(e)}")
+
+        finally:
+            if cleanup:
+                cleanup()
+
+    def get(self, job_id):
+        """
+        Look up a job.
+
+        Returns:
+            Job or None: The job, or None if unknown or expired
+        """
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Request cancellation. Running jobs stop at the next frame batch.
+
+        Returns:
+            Job or None: The job, or None if unknown or expired
+        """
+        job = self.get(job_id)
+        if job is not None:
+            job.request_cancel()
+        return job
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self.jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
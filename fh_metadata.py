@@ -0,0 +1,81 @@
+import threading
+import time
+import yt_dlp
+
+
+class MetadataCache:
+    """
+    yt-dlp metadata of videos, fetched once and reused for a while.
+
+    Validation, download and extraction of one job all read the same info
+    dictionary instead of each calling extract_info, which is a network round
+    trip of several seconds. Entries expire after ttl_seconds, well before
+    the signed media URLs inside them do.
+    """
+
+    def __init__(self, ttl_seconds=600, ydl_factory=None):
+        """
+        Args:
+            ttl_seconds: How long fetched metadata is reused
+            ydl_factory: Callable(options) returning a yt_dlp.YoutubeDL-like
+                         context manager (defaults to yt_dlp.YoutubeDL); lets
+                         tests stand in for the network
+        """
+        self.ttl_seconds = ttl_seconds
+        self.ydl_factory = ydl_factory or yt_dlp.YoutubeDL
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """
+        Metadata of a video, from the cache or fetched.
+
+        Args:
+            url: Video URL
+
+        Returns:
+            dict: yt-dlp info dictionary. extract_info already ran yt-dlp's
+                  default format selection on it (without downloading);
+                  VideoDownloader selects its own format from 'formats'.
+
+        Raises:
+            yt_dlp.utils.DownloadError: If yt-dlp cannot extract the video
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                return entry[1]
+
+        options = {"quiet": True, "noplaylist": True, "extract_flat": False}
+        with self.ydl_factory(options) as ydl:
+            info = ydl.extract_info(url, download=False)
+
+        with self._lock:
+            self._entries[url] = (time.monotonic(), info)
+            self._prune(now)
+        return info
+
+    def _prune(self, now):
+        """Drop expired entries. Call with the lock held."""
+        expired = [
+            url
+            for url, (fetched_at, _) in self._entries.items()
+            if now - fetched_at >= self.ttl_seconds
+        ]
+        for url in expired:
+            del self._entries[url]
+
+
+def video_properties(info):
+    """
+    Frame rate and duration of a video from its metadata.
+
+    Args:
+        info: yt-dlp info dictionary, processed for the downloaded format so
+              'fps' is the frame rate of that format
+
+    Returns:
+        dict: 'fps' and 'duration' in seconds, each None if unknown
+    """
+    return {"fps": info.get("fps"), "duration": info.get("duration")}
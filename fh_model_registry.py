@@ -0,0 +1,110 @@
+import threading
+import time
+import numpy as np
+from deepface import DeepFace
+
+
+class ModelRegistry:
+    """
+    Builds DeepFace models once and keeps them warm in memory.
+
+    DeepFace caches built models per process, so once a model or detector is
+    warmed up here, every later call using its name (DeepFace.represent,
+    DeepFace.extract_faces, FaceRecognizer) reuses the same instance.
+    """
+
+    def __init__(
+        self, model_names=("Facenet",), detector_backends=("retinaface", "mtcnn")
+    ):
+        """
+        Args:
+            model_names: Recognition models to preload
+            detector_backends: Face detectors to preload
+        """
+        self.model_names = tuple(model_names)
+        self.detector_backends = tuple(detector_backends)
+        self.models = {}
+        self.status = {
+            name: {"ready": False, "load_seconds": None, "error": None}
+            for name in self.model_names + self.detector_backends
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        """True once every model and detector has loaded successfully."""
+        return all(entry["ready"] for entry in self.status.values())
+
+    def _load(self, name, loader):
+        """Run a loader, recording its load time or error."""
+        start = time.perf_counter()
+        try:
+            loader()
+        except Exception as e:
+            self.status[name]["error"] = str(e)
+            print(f"[ModelRegistry] Failed to load {name}: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        self.status[name].update(ready=True, load_seconds=round(elapsed, 2))
+        print(f"[ModelRegistry] {name} ready in {elapsed:.2f}s")
+
+    def _build_recognition_model(self, name):
+        """Build a recognition model and run one dummy forward pass."""
+        model = DeepFace.build_model(name)
+        height, width = model.input_shape
+        model.model.predict_on_batch(np.zeros((1, height, width, 3), np.float32))
+        self.models[name] = model
+
+    @staticmethod
+    def _build_detector(name):
+        """Build a detector through DeepFace so its internal cache keeps it."""
+        DeepFace.extract_faces(
+            img_path=np.zeros((128, 128, 3), dtype=np.uint8),
+            detector_backend=name,
+            enforce_detection=False,
+        )
+
+    def warm_up(self):
+        """Build every registered model and detector. Safe to call twice."""
+        with self._lock:
+            for name in self.model_names:
+                if not self.status[name]["ready"]:
+                    self._load(name, lambda: self._build_recognition_model(name))
+            for name in self.detector_backends:
+                if not self.status[name]["ready"]:
+                    self._load(name, lambda: self._build_detector(name))
+
+    def warm_up_in_background(self):
+        """
+        Start warm_up in a daemon thread so the server can accept requests.
+
+        Returns:
+            threading.Thread: The loading thread
+        """
+        thread = threading.Thread(
+            target=self.warm_up, name="model-warm-up", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def get_model(self, name):
+        """
+        Return a warm recognition model, building it on first use if needed.
+
+        Returns:
+            FacialRecognition: DeepFace model client
+        """
+        if name not in self.models:
+            with self._lock:
+                if name not in self.models:
+                    self.models[name] = DeepFace.build_model(name)
+        return self.models[name]
+
+    def report(self):
+        """
+        Readiness and load time of every registered model.
+
+        Returns:
+            dict: Model name -> {'ready', 'load_seconds', 'error'}
+        """
+        return {name: dict(entry) for name, entry in self.status.items()}
@@ -0,0 +1,288 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import cv2
+from fh_batch_planner import BatchPlanner
+from fh_face_recognizer import FaceRecognizer, RecognitionCancelled
+from fh_frame_extractor import VideoFrameExtractor
+from fh_prefilter import HaarPrefilter
+
+# Per-process recognizer, built once by the pool initializer
+_worker_recognizer = None
+
+
+def _init_worker(
+    reference_embedding,
+    detector_backend,
+    labels,
+    threads_per_worker,
+    prefilter=False,
+    detection_width=None,
+):
+    """
+    Load FaceNet and the detector once per worker process.
+
+    Limits each worker's CPU threads so workers don't oversubscribe cores.
+    """
+    global _worker_recognizer
+
+    cv2.setNumThreads(1)
+    try:
+        import tensorflow as tf
+
+        tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    except (ImportError, RuntimeError) as e:
+        print(f"[Worker {os.getpid()}] Could not limit TensorFlow threads: {e}")
+
+    _worker_recognizer = FaceRecognizer(
+        reference_embedding,
+        detector_backend=detector_backend,
+        labels=labels,
+        prefilter=HaarPrefilter() if prefilter else None,
+        detection_width=detection_width,
+    )
+    _worker_recognizer._build_model()
+
+
+def _process_segment(
+    video_path,
+    start_frame,
+    end_frame,
+    frame_interval,
+    threshold,
+    top_k=None,
+    shot_detection=False,
+    tracking=False,
+    roi=None,
+    frame_offset=0,
+    memory_budget=None,
+    stop_event=None,
+):
+    """
+    Extract and recognize one segment of the video in a worker process.
+
+    Args:
+        memory_budget: Bytes of decoded frames this worker may buffer
+        stop_event: Event shared with the parent process; when set, the
+                    segment stops at its next batch
+
+    Returns:
+        list: Matches found in the segment
+    """
+    extractor = VideoFrameExtractor(
+        video_path, start_frame, end_frame, frame_offset=frame_offset
+    )
+    success, msg = extractor.open_video()
+    if not success:
+        raise RuntimeError(msg)
+
+    extractor.frame_interval = frame_interval
+    extractor.shot_detection = shot_detection
+    extractor.roi = roi
+    batch_planner = BatchPlanner(memory_budget=memory_budget, tune=True)
+    extractor.batch_planner = batch_planner
+    success, frame_generator_or_error = extractor.process_video(pipelined=True)
+    if not success:
+        raise RuntimeError(frame_generator_or_error)
+
+    return _worker_recognizer.find_matches(
+        frame_generator_or_error,
+        threshold=threshold,
+        fps=extractor.fps,
+        processable_frames=extractor.total_processable_frames,
+        top_k=top_k,
+        tracking=tracking,
+        batch_planner=batch_planner,
+        cancel_event=stop_event,
+    )
+
+
+def _merge_matches(matches, top_k=None):
+    """
+    Order matches gathered from several segments.
+
+    Returns:
+        list: Matches in frame order, or the top_k closest first
+    """
+    if top_k is not None:
+        return sorted(matches, key=lambda match: match["distance"])[:top_k]
+    return sorted(matches, key=lambda match: match["frame_index"])
+
+
+def split_segments(total_frames, frame_interval, segment_count, start_frame=0):
+    """
+    Split a video into contiguous segments aligned to the sampling grid.
+
+    Every segment holds at least one sampled frame, so segments extracted
+    separately yield exactly the frames of one full pass.
+
+    Args:
+        total_frames: Frame where the range ends, exclusive (the number of
+                      frames in the video for a full pass)
+        frame_interval: Sampling interval in frames
+        segment_count: Desired number of segments
+        start_frame: Frame where the range starts
+
+    Returns:
+        list: (start_frame, end_frame) tuples, end exclusive
+    """
+    first = -(-start_frame // frame_interval)
+    stop = -(-total_frames // frame_interval)
+    samples = max(0, stop - first)
+    segment_count = max(1, min(segment_count, samples))
+    samples_per_segment = max(1, -(-samples // segment_count))
+
+    segments = []
+    for first_sample in range(first, stop, samples_per_segment):
+        start = max(start_frame, first_sample * frame_interval)
+        end = min(total_frames, (first_sample + samples_per_segment) * frame_interval)
+        segments.append((start, end))
+    return segments
+
+
+def find_matches_parallel(
+    video_path,
+    reference_embedding,
+    frame_interval,
+    total_frames,
+    detector_backend="mtcnn",
+    labels=None,
+    threshold=0.35,
+    workers=None,
+    segments_per_worker=2,
+    progress_callback=None,
+    cancel_event=None,
+    top_k=None,
+    shot_detection=False,
+    prefilter=False,
+    tracking=False,
+    detection_width=None,
+    start_frame=0,
+    roi=None,
+    frame_offset=0,
+    memory_budget=None,
+):
+    """
+    Find matches by recognizing time segments of the video in parallel.
+
+    Each worker process opens its own VideoCapture and loads the FaceNet and
+    detector models once. Segment results are merged in frame order, or by
+    distance in top_k mode, where every segment keeps its own best k.
+
+    Args:
+        video_path: Path to a local video file
+        reference_embedding: Reference embedding, or matrix of embeddings
+        frame_interval: Sampling interval in frames
+        total_frames: Number of frames in the video (must be known), or the
+                      end of the range to search
+        detector_backend: Face detector to use in every worker
+        labels: Identity labels for gallery mode
+        threshold: Cosine distance threshold
+        workers: Number of worker processes (defaults to CPU count)
+        segments_per_worker: Segments queued per worker, for load balancing
+        progress_callback: Optional callable(processed, processable_frames,
+                           matches) invoked as segments complete
+        cancel_event: Optional threading.Event; when set, queued segments are
+                      cancelled and running ones stop at their next batch
+        top_k: Keep only the k closest matches, returned closest first
+        shot_detection: Analyze only representative frames of each shot
+        prefilter: Drop frames without faces with a Haar prefilter in every
+                   worker before the main detector runs
+        tracking: Reuse embeddings of faces tracked across samples
+        detection_width: Detect on frames downscaled to this width
+        start_frame: Frame where the range to search starts
+        roi: (x, y, w, h) frame region to search, as fractions
+        frame_offset: Frame of the full video where the file starts, for a
+                      downloaded section
+        memory_budget: Bytes of decoded frames the whole job may buffer,
+                       split evenly between workers (None for a share of the
+                       available memory)
+
+    Returns:
+        list: Dictionaries with 'frame_index' and 'timestamp' for each match
+
+    Raises:
+        RecognitionCancelled: If cancel_event is set during recognition
+    """
+    if total_frames <= 0:
+        raise ValueError("Parallel recognition requires a known frame count")
+
+    workers = workers or os.cpu_count() or 1
+    segments = split_segments(
+        total_frames, frame_interval, workers * segments_per_worker, start_frame
+    )
+    if not segments:
+        print("No sampled frames in the requested range")
+        return []
+    workers = min(workers, len(segments))
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    # Workers decode at the same time, so each gets its part of the budget
+    worker_budget = BatchPlanner(memory_budget=memory_budget).budget() // workers
+
+    print(f"Recognizing {len(segments)} segments with {workers} worker processes...")
+
+    # TensorFlow is not fork-safe, so workers start from a clean interpreter
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(
+            reference_embedding,
+            detector_backend,
+            labels,
+            threads_per_worker,
+            prefilter,
+            detection_width,
+        ),
+    ) as executor:
+        # Running segments poll this between batches, so a cancel or a failed
+        # segment stops every worker instead of only dropping queued segments
+        stop_event = manager.Event()
+        try:
+            pending = {
+                executor.submit(
+                    _process_segment,
+                    video_path,
+                    start,
+                    end,
+                    frame_interval,
+                    threshold,
+                    top_k,
+                    shot_detection,
+                    tracking,
+                    roi,
+                    frame_offset,
+                    worker_budget,
+                    stop_event,
+                ): len(range(start, end, frame_interval))
+                for start, end in segments
+            }
+            processable_frames = sum(pending.values())
+            processed = 0
+            matches = []
+
+            while pending:
+                done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                if cancel_event is not None and cancel_event.is_set():
+                    print("Parallel recognition cancelled")
+                    raise RecognitionCancelled("Recognition cancelled")
+
+                for future in done:
+                    matches.extend(future.result())
+                    processed += pending.pop(future)
+
+                if done:
+                    matches = _merge_matches(matches, top_k)
+                    if progress_callback:
+                        progress_callback(processed, processable_frames, matches)
+        except BaseException:
+            stop_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+
+    matches = _merge_matches(matches, top_k)
+    print(f"Parallel recognition complete: {len(matches)} matches")
+    return matches
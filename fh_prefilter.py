@@ -0,0 +1,79 @@
+import os
+import cv2
+
+# Cascades shipped with opencv-python in cv2.data.haarcascades
+HAAR_CASCADES = ("haarcascade_frontalface_default.xml", "haarcascade_profileface.xml")
+
+
+class HaarPrefilter:
+    """
+    Cheap face-presence check run before the MTCNN/RetinaFace detector.
+
+    Frontal and profile Haar cascades are run on a downscaled grayscale copy
+    of the frame with permissive settings. The goal is not to find faces
+    precisely but to drop frames that clearly contain none, so false
+    positives are fine and false negatives are kept as rare as possible.
+    """
+
+    def __init__(self, scale_width=480, min_neighbors=2, min_size=16):
+        """
+        Args:
+            scale_width: Width frames are downscaled to before detection
+            min_neighbors: Haar minNeighbors (lower is more permissive)
+            min_size: Smallest face side, in downscaled pixels
+        """
+        self.scale_width = scale_width
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+        self.cascades = []
+        cascade_dir = getattr(getattr(cv2, "data", None), "haarcascades", "")
+        for name in HAAR_CASCADES:
+            cascade = cv2.CascadeClassifier(os.path.join(cascade_dir, name))
+            if cascade.empty():
+                print(f"[Prefilter] Could not load {name}")
+                continue
+            self.cascades.append(cascade)
+
+        if not self.cascades:
+            print("[Prefilter] No Haar cascade available, prefilter disabled")
+
+    @property
+    def enabled(self):
+        """True if at least one cascade loaded."""
+        return bool(self.cascades)
+
+    def has_faces(self, frame):
+        """
+        Check whether a frame may contain a face.
+
+        Args:
+            frame: RGB frame as decoded by VideoFrameExtractor
+
+        Returns:
+            bool: False only if no cascade found anything
+        """
+        if not self.cascades:
+            return True
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        height, width = gray.shape
+        if width > self.scale_width:
+            scale = self.scale_width / width
+            gray = cv2.resize(
+                gray,
+                (self.scale_width, max(1, int(height * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        gray = cv2.equalizeHist(gray)
+
+        for cascade in self.cascades:
+            faces = cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=self.min_neighbors,
+                minSize=(self.min_size, self.min_size),
+            )
+            if len(faces) > 0:
+                return True
+        return False
@@ -0,0 +1,128 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+
+
+def is_stream_url(source):
+    """True for HTTP(S) media URLs that OpenCV reads while they download."""
+    return isinstance(source, str) and source.startswith(("http://", "https://"))
+
+
+def is_pipe(path):
+    """True for named pipes, which can only be read once from start to end."""
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except (OSError, TypeError):
+        return False
+
+
+class UploadStream:
+    """
+    Feeds an uploaded video to the frame extractor through a named pipe.
+
+    A background thread copies the upload into the pipe while OpenCV decodes
+    from the other end, so recognition starts on the first bytes instead of
+    after a full copy to a temporary file. The pipe can only be read once and
+    cannot seek: sampling is sequential and multi-pass features (parallel
+    workers, adaptive sampling, the embedding cache) are not available.
+
+    Containers that keep their index at the end of the file (MP4 without
+    faststart) cannot be decoded from a pipe.
+    """
+
+    def __init__(self, file_obj, chunk_size=1024 * 1024):
+        """
+        Args:
+            file_obj: Readable binary file object with the video data
+            chunk_size: Bytes copied into the pipe per write
+        """
+        self.file_obj = file_obj
+        self.chunk_size = chunk_size
+        self.temp_dir = tempfile.mkdtemp(prefix="facehunt_stream_")
+        self.path = os.path.join(self.temp_dir, "video")
+        self.bytes_fed = 0
+        self.error = None
+        os.mkfifo(self.path)
+
+        self._worker = threading.Thread(
+            target=self._feed, name="upload-stream", daemon=True
+        )
+        self._worker.start()
+
+    @staticmethod
+    def supported():
+        """True if the platform has named pipes."""
+        return hasattr(os, "mkfifo")
+
+    def _feed(self):
+        """Copy the upload into the pipe. Blocks until a reader opens it."""
+        try:
+            with open(self.path, "wb") as pipe:
+                for chunk in iter(lambda: self.file_obj.read(self.chunk_size), b""):
+                    pipe.write(chunk)
+                    self.bytes_fed += len(chunk)
+        except BrokenPipeError:
+            # The reader stopped early (max_matches, cancellation)
+            pass
+        except (OSError, ValueError) as e:
+            self.error = e
+            print(f"[Stream] Feeding the upload failed: {e}")
+        finally:
+            self.file_obj.close()
+
+    def close(self):
+        """Stop feeding and remove the pipe."""
+        while self._worker.is_alive():
+            # Open and close the read end so a writer blocked on open() or
+            # on a full pipe fails with a broken pipe
+            try:
+                fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError:
+                break
+            self._worker.join(timeout=0.1)
+            os.close(fd)
+            self._worker.join(timeout=0.1)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class SpooledUpload:
+    """
+    Local path to an upload the web framework already spooled to disk.
+
+    Starlette writes every upload to an anonymous temporary file before the
+    request handler runs. Rather than copying it to a named file, its
+    descriptor is kept open and exposed through a symlink into
+    /proc/<pid>/fd. The result is an ordinary seekable file: the extractor
+    can seek it, the embedding cache can hash it and worker processes can
+    open it, none of which works through a named pipe.
+    """
+
+    def __init__(self, file_obj, suffix=""):
+        """
+        Args:
+            file_obj: Spooled upload (tempfile.SpooledTemporaryFile or any
+                      file object with a real descriptor). It can be closed
+                      once the SpooledUpload exists.
+            suffix: File extension of the upload, e.g. ".mp4"
+        """
+        if hasattr(file_obj, "rollover"):
+            # Small uploads are still in memory
+            file_obj.rollover()
+        self._fd = os.dup(file_obj.fileno())
+        self.temp_dir = tempfile.mkdtemp(prefix="facehunt_upload_")
+        self.path = os.path.join(self.temp_dir, "video" + suffix)
+        os.symlink(f"/proc/{os.getpid()}/fd/{self._fd}", self.path)
+
+    @staticmethod
+    def supported():
+        """True if open descriptors can be reached by path (Linux /proc)."""
+        return os.path.isdir(f"/proc/{os.getpid()}/fd")
+
+    def close(self):
+        """Remove the path and release the spooled file."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
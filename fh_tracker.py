@@ -0,0 +1,182 @@
+import numpy as np
+
+
+def format_timestamp(frame_idx, fps):
+    """
+    Format the time of a frame as "MM:SS".
+
+    Args:
+        frame_idx: Frame index in the video
+        fps: Video frames per second
+
+    Returns:
+        str: Minutes and whole seconds, zero-padded
+    """
+    timestamp_seconds = frame_idx / fps
+    minutes = int(timestamp_seconds // 60)
+    seconds = int(timestamp_seconds % 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Intersection over union between two sets of (x, y, w, h) boxes.
+
+    Returns:
+        np.ndarray: IoU matrix with shape (len(boxes_a), len(boxes_b))
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    left = np.maximum(a[:, None, 0], b[None, :, 0])
+    top = np.maximum(a[:, None, 1], b[None, :, 1])
+    right = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    bottom = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+
+    intersection = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    areas_a = a[:, 2] * a[:, 3]
+    areas_b = b[:, 2] * b[:, 3]
+    union = areas_a[:, None] + areas_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-6), 0.0)
+
+
+class FaceTrack:
+    """A face followed across consecutive sampled frames."""
+
+    def __init__(self, box):
+        """
+        Args:
+            box: Face box (x, y, w, h) where the track starts
+        """
+        self.box = box
+        self.embedding = None
+        self.age = 0
+        self.missed = 0
+
+
+class FaceTracker:
+    """
+    Carries face identities across sampled frames by box overlap.
+
+    A face whose box overlaps a live track strongly enough reuses the track's
+    FaceNet embedding instead of being embedded again. A face is embedded
+    when it starts a new track, when the overlap drops (the face moved or
+    the match is uncertain) or when the track's embedding gets too old.
+    """
+
+    def __init__(self, iou_threshold=0.3, refresh_iou=0.6, max_age=5, max_missed=1):
+        """
+        Args:
+            iou_threshold: Minimum IoU for a face to continue a track
+            refresh_iou: Below this IoU the face is embedded again
+            max_age: Samples an embedding is reused before it is refreshed
+            max_missed: Samples a track survives without a matching face
+        """
+        self.iou_threshold = iou_threshold
+        self.refresh_iou = refresh_iou
+        self.max_age = max_age
+        self.max_missed = max_missed
+        self.tracks = []
+        self.embedded = 0
+        self.reused = 0
+
+    def reset(self):
+        """Forget every live track (e.g. after an embedding failure)."""
+        self.tracks = []
+
+    def update(self, boxes):
+        """
+        Match the faces of the next sampled frame to live tracks.
+
+        Args:
+            boxes: Face boxes (x, y, w, h) detected in the frame
+
+        Returns:
+            list: (FaceTrack, needs_embedding) for each box, in order
+        """
+        assignments = [None] * len(boxes)
+        matched_tracks = set()
+
+        if self.tracks and len(boxes) > 0:
+            ious = box_iou(boxes, [track.box for track in self.tracks])
+            for flat in np.argsort(-ious, axis=None):
+                face, track_pos = np.unravel_index(flat, ious.shape)
+                iou = ious[face, track_pos]
+                if iou < self.iou_threshold:
+                    break
+                if assignments[face] is not None or track_pos in matched_tracks:
+                    continue
+
+                track = self.tracks[track_pos]
+                matched_tracks.add(track_pos)
+                needs_embedding = iou < self.refresh_iou or track.age >= self.max_age
+                track.box = boxes[face]
+                track.missed = 0
+                track.age = 0 if needs_embedding else track.age + 1
+                assignments[face] = (track, needs_embedding)
+
+        live = []
+        for track_pos, track in enumerate(self.tracks):
+            if track_pos not in matched_tracks:
+                track.missed += 1
+            if track.missed <= self.max_missed:
+                live.append(track)
+        self.tracks = live
+
+        for face, assignment in enumerate(assignments):
+            if assignment is None:
+                track = FaceTrack(boxes[face])
+                self.tracks.append(track)
+                assignments[face] = (track, True)
+
+        for _, needs_embedding in assignments:
+            if needs_embedding:
+                self.embedded += 1
+            else:
+                self.reused += 1
+        return assignments
+
+
+def build_appearances(matches, fps, max_gap):
+    """
+    Merge matched frames into appearance intervals per identity.
+
+    Args:
+        matches: Match dictionaries from FaceRecognizer.find_matches
+        fps: Video frames per second
+        max_gap: Largest distance in frames between two matched samples of
+                 the same appearance (e.g. twice the sampling interval)
+
+    Returns:
+        list: Dictionaries with 'start_frame', 'end_frame', 'start', 'end'
+              and 'samples', plus 'label' in gallery mode, in time order
+    """
+    frames_by_label = {}
+    for match in sorted(matches, key=lambda match: match["frame_index"]):
+        frames_by_label.setdefault(match.get("label"), []).append(match["frame_index"])
+
+    appearances = []
+    for label, frames in frames_by_label.items():
+        runs = [[frames[0]]]
+        for frame_idx in frames[1:]:
+            if frame_idx == runs[-1][-1]:
+                continue
+            if frame_idx - runs[-1][-1] <= max_gap:
+                runs[-1].append(frame_idx)
+            else:
+                runs.append([frame_idx])
+
+        for run in runs:
+            appearance = {
+                "start_frame": run[0],
+                "end_frame": run[-1],
+                "start": format_timestamp(run[0], fps),
+                "end": format_timestamp(run[-1], fps),
+                "samples": len(run),
+            }
+            if label is not None:
+                appearance["label"] = label
+            appearances.append(appearance)
+
+    appearances.sort(key=lambda appearance: appearance["start_frame"])
+    return appearances
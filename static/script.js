@@ -36,6 +36,9 @@ const backToStep1Btn = document.getElementById("backToStep1");
 const processingModeRadios = document.querySelectorAll('input[name="processingMode"]');
 const backToStep2Btn = document.getElementById("backToStep2");
 const startRecognitionBtn = document.getElementById("startRecognitionBtn");
+const startTimeInput = document.getElementById("startTimeInput");
+const endTimeInput = document.getElementById("endTimeInput");
+const regionSelect = document.getElementById("regionSelect");
 const processingSection = document.getElementById("processingSection");
 const resultsSection = document.getElementById("resultsSection");
 const errorSection = document.getElementById("errorSection");
@@ -43,6 +46,7 @@ const progressFill = document.getElementById("progressFill");
 const progressText = document.getElementById("progressText");
 const resultsDescription = document.getElementById("resultsDescription");
 const matchesList = document.getElementById("matchesList");
+const liveMatchesList = document.getElementById("liveMatchesList");
 const errorMessage = document.getElementById("errorMessage");
 const startNewSearchBtn = document.getElementById("startNewSearch");
 const retryBtn = document.getElementById("retryBtn");
@@ -290,6 +294,13 @@ startRecognitionBtn.addEventListener("click", async () => {
         formData.append("reference_image", state.referenceImage);
         const mode = state.processingMode === "high-precision" ? "precision" : "balanced";
         formData.append("mode", mode);
+        if (startTimeInput.value.trim()) {
+            formData.append("start_time", startTimeInput.value.trim());
+        }
+        if (endTimeInput.value.trim()) {
+            formData.append("end_time", endTimeInput.value.trim());
+        }
+        formData.append("roi", regionSelect.value);
 
         if (state.videoType === "url") {
             formData.append("video_url", state.videoSource);
@@ -297,7 +308,7 @@ startRecognitionBtn.addEventListener("click", async () => {
             formData.append("video_file", state.videoSource);
         }
 
-        const response = await fetch(`${API_BASE_URL}/recognize`, {
+        const response = await fetch(`${API_BASE_URL}/jobs`, {
             method: "POST",
             body: formData,
         });
@@ -305,7 +316,7 @@ startRecognitionBtn.addEventListener("click", async () => {
         const data = await response.json();
 
         if (response.ok) {
-            showResults(data);
+            streamJob(data.job_id);
         } else {
             showError(data.detail || "Recognition failed");
         }
@@ -314,6 +325,71 @@ startRecognitionBtn.addEventListener("click", async () => {
     }
 });
 
+function streamJob(jobId) {
+    liveMatchesList.innerHTML = "";
+    progressFill.style.width = "0%";
+    progressText.textContent = "Waiting for a free worker...";
+
+    const events = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+
+    events.addEventListener("match", (event) => {
+        const { match } = JSON.parse(event.data);
+        liveMatchesList.appendChild(createMatchItem(match));
+    });
+
+    events.addEventListener("progress", (event) => {
+        const progress = JSON.parse(event.data);
+        if (progress.total > 0) {
+            const percentage = Math.min(100, Math.round((100 * progress.processed) / progress.total));
+            progressFill.style.width = `${percentage}%`;
+            progressText.textContent = `${percentage}% - ${progress.matches} match${progress.matches !== 1 ? "es" : ""} so far`;
+        } else {
+            progressFill.style.width = "100%";
+            progressText.textContent = `${progress.processed} frames - ${progress.matches} match${progress.matches !== 1 ? "es" : ""} so far`;
+        }
+    });
+
+    events.addEventListener("done", (event) => {
+        events.close();
+        const job = JSON.parse(event.data);
+        if (job.status === "completed") {
+            showResults(job);
+        } else {
+            showError(job.message || "Recognition failed");
+        }
+    });
+
+    events.onerror = () => {
+        if (events.readyState === EventSource.CLOSED) {
+            showError("Lost connection to server.");
+        }
+    };
+}
+
+function createResultItem(text) {
+    // Labels come from user input, so they are set as text, never as HTML
+    const item = document.createElement("div");
+    item.className = "match-item";
+    const wrapper = document.createElement("div");
+    const time = document.createElement("div");
+    time.className = "match-time";
+    time.textContent = text;
+    wrapper.appendChild(time);
+    item.appendChild(wrapper);
+    return item;
+}
+
+function createMatchItem(match) {
+    const label = match.label ? ` (${match.label})` : "";
+    return createResultItem(`Face detected at ${match.timestamp}${label}`);
+}
+
+
+function createAppearanceItem(appearance) {
+    const label = appearance.label ? ` (${appearance.label})` : "";
+    const range = appearance.start === appearance.end ? `at ${appearance.start}` : `from ${appearance.start} to ${appearance.end}`;
+    return createResultItem(`Face visible ${range}${label}`);
+}
 
 function showResults(data) {
     processingSection.classList.add("hidden");
@@ -321,12 +397,13 @@ function showResults(data) {
     const matchCount = data.matches ? data.matches.length : 0;
     resultsDescription.textContent = `Found ${matchCount} match${matchCount !== 1 ? "es" : ""} in the video.`;
     matchesList.innerHTML = "";
-    if (matchCount > 0) {
+    if (data.appearances && data.appearances.length > 0) {
+        data.appearances.forEach((appearance) => {
+            matchesList.appendChild(createAppearanceItem(appearance));
+        });
+    } else if (matchCount > 0) {
         data.matches.forEach((match) => {
-            const matchItem = document.createElement("div");
-            matchItem.className = "match-item";
-            matchItem.innerHTML = `<div><div class="match-time">Face detected at ${match.timestamp}</div></div>`;
-            matchesList.appendChild(matchItem);
+            matchesList.appendChild(createMatchItem(match));
         });
     } else {
         matchesList.innerHTML = '<p class="no-matches">No matches found in the video.</p>';
@@ -344,6 +421,9 @@ startNewSearchBtn.addEventListener("click", () => {
     imageInput.value = "";
     videoInput.value = "";
     videoUrlInput.value = "";
+    startTimeInput.value = "";
+    endTimeInput.value = "";
+    regionSelect.value = "full";
     imagePreview.classList.add("hidden");
     videoPreview.classList.add("hidden");
     imageUploadArea.classList.remove("hidden");
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_video(tmp_path):
+    """
+    Write a small MJPG AVI whose frame i is filled with the gray level i.
+
+    Returns:
+        callable: make(frame_count=30, fps=10, size=(64, 48), levels=None)
+                  -> path, levels giving the gray level of each frame instead
+    """
+
+    def make(frame_count=30, fps=10, size=(64, 48), levels=None):
+        levels = levels if levels is not None else range(frame_count)
+        path = str(tmp_path / "video.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+        assert writer.isOpened()
+        for level in levels:
+            writer.write(np.full((size[1], size[0], 3), level, dtype=np.uint8))
+        writer.release()
+        return path
+
+    return make
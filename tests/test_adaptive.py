@@ -0,0 +1,20 @@
+from fh_adaptive import candidate_windows
+
+
+def test_windows_span_one_interval_around_candidates():
+    assert candidate_windows([50], coarse_interval=10) == [(41, 60)]
+
+
+def test_overlapping_windows_merge():
+    assert candidate_windows([60, 50, 50, 200], coarse_interval=10) == [
+        (41, 70),
+        (191, 210),
+    ]
+
+
+def test_windows_clipped_to_the_range():
+    assert candidate_windows([0, 95], 10, start_frame=0, end_frame=100) == [
+        (0, 10),
+        (86, 100),
+    ]
+    assert candidate_windows([25], 10, start_frame=20) == [(20, 35)]
@@ -0,0 +1,57 @@
+from fh_batch_planner import BatchPlanner
+
+FRAME_SHAPE = (100, 100, 3)
+
+
+def tuned_planner(**kwargs):
+    planner = BatchPlanner(memory_budget=10**9, tune=True, **kwargs)
+    planner.plan(FRAME_SHAPE, slot_count=4)
+    return planner
+
+
+def record_step(planner, frames_per_second):
+    for _ in range(planner.batches_per_step):
+        planner.record(planner.batch_size, planner.batch_size / frames_per_second)
+
+
+def test_plan_fits_batches_to_the_budget():
+    frame_bytes = 100 * 100 * 3
+    planner = BatchPlanner(memory_budget=4 * 10 * frame_bytes)
+
+    assert planner.plan(FRAME_SHAPE, slot_count=4) == 10
+    assert planner.batch_size == 10
+    assert BatchPlanner(memory_budget=1).plan(FRAME_SHAPE, 4) == 1
+
+
+def test_tuning_doubles_while_throughput_improves():
+    planner = tuned_planner(max_batch=64)
+    assert planner.batch_size == 4
+
+    record_step(planner, 10)
+    assert planner.batch_size == 8
+    record_step(planner, 20)
+    assert planner.batch_size == 16
+    record_step(planner, 20.5)
+
+    assert planner.batch_size == 8
+    assert not planner.tuning
+
+
+def test_tuning_stops_at_capacity():
+    planner = tuned_planner(max_batch=8)
+
+    record_step(planner, 10)
+    record_step(planner, 20)
+
+    assert planner.batch_size == 8
+    assert not planner.tuning
+
+
+def test_record_ignores_partial_batches():
+    planner = tuned_planner(max_batch=64)
+
+    for _ in range(5):
+        planner.record(planner.batch_size - 1, 0.1)
+
+    assert planner.batch_size == 4
+    assert planner.tuning
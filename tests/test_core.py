@@ -0,0 +1,43 @@
+import pytest
+
+from fh_core import FaceHuntCore
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [(None, None), ("", None), (90, 90.0), ("75", 75.0), ("1:05", 65.0)],
+)
+def test_parse_time(value, seconds):
+    assert FaceHuntCore.parse_time(value) == seconds
+
+
+def test_parse_time_hours():
+    assert FaceHuntCore.parse_time("1:02:03.5") == 3723.5
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["inf", "nan", float("inf"), -1, "1:-5", "0:75", "1:60:00", "1:2:3:4", "abc"],
+)
+def test_parse_time_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        FaceHuntCore.parse_time(value)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"max_matches": 1, "top_k": 1},
+        {"max_matches": 0},
+        {"top_k": 0},
+        {"detection_width": -1},
+        {"sampling": "random"},
+    ],
+)
+def test_check_search_options_rejects_invalid(options):
+    with pytest.raises(ValueError):
+        FaceHuntCore.check_search_options(**options)
+
+
+def test_check_search_options_keeps_full_resolution():
+    FaceHuntCore.check_search_options(detection_width=0)
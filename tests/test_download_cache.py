@@ -0,0 +1,59 @@
+import os
+
+from fh_download_cache import DownloadCache
+
+
+def write_video(size):
+    def download(output_template):
+        with open(output_template % {"ext": "mp4"}, "wb") as f:
+            f.write(b"\0" * size)
+
+    return download
+
+
+def test_evict_removes_videos_and_their_lock_files(tmp_path):
+    cache = DownloadCache(str(tmp_path), max_bytes=1500)
+
+    first, lease = cache.fetch("first", write_video(1000))
+    lease.release()
+    os.utime(first, (0, 0))
+    second, lease = cache.fetch("second", write_video(1000))
+    lease.release()
+
+    assert not os.path.exists(first)
+    assert not os.path.exists(tmp_path / ".first.lock")
+    assert os.path.exists(second)
+
+
+def test_evict_skips_leased_videos(tmp_path):
+    cache = DownloadCache(str(tmp_path), max_bytes=1500)
+
+    first, first_lease = cache.fetch("first", write_video(1000))
+    os.utime(first, (0, 0))
+    second, lease = cache.fetch("second", write_video(1000))
+    lease.release()
+    first_lease.release()
+
+    assert os.path.exists(first)
+    assert os.path.exists(second)
+
+
+def test_evict_removes_stale_lock_files(tmp_path):
+    cache = DownloadCache(str(tmp_path))
+    (tmp_path / ".gone.lock").touch()
+
+    cache.evict()
+
+    assert not os.path.exists(tmp_path / ".gone.lock")
+
+
+def test_fetch_after_lock_file_removed(tmp_path):
+    cache = DownloadCache(str(tmp_path))
+    video, lease = cache.fetch("video", write_video(10))
+    lease.release()
+    os.remove(video)
+    cache.evict()
+
+    video, lease = cache.fetch("video", write_video(10))
+    lease.release()
+    assert os.path.exists(video)
@@ -0,0 +1,31 @@
+import pytest
+
+from fh_downloader import VideoDownloader
+
+INFO = {"id": "abcdefghijk", "title": "Test video", "duration": 60}
+
+
+@pytest.fixture(autouse=True)
+def ffmpeg_available(monkeypatch):
+    monkeypatch.setattr("fh_downloader.shutil.which", lambda name: "/usr/bin/ffmpeg")
+
+
+def test_section_of_search_range():
+    assert VideoDownloader._section(INFO, None, None) is None
+    assert VideoDownloader._section(INFO, 10, 20) == (10.0, 20.0)
+    assert VideoDownloader._section(INFO, 10, None) == (10.0, 60.0)
+    assert VideoDownloader._section(INFO, None, 20) == (0.0, 20.0)
+
+
+def test_section_end_clamped_to_duration():
+    assert VideoDownloader._section(INFO, 30, 90) == (30.0, 60.0)
+
+
+@pytest.mark.parametrize("start, end", [(-5, 10), (20, 10), (20, 20), (70, 90)])
+def test_invalid_section_rejected(start, end):
+    with pytest.raises(ValueError):
+        VideoDownloader._section(INFO, start, end)
+
+
+def test_section_without_duration_downloads_whole_video():
+    assert VideoDownloader._section({"id": "x"}, 10, None) is None
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+
+from fh_face_index import FaceIndex
+
+
+def random_faces(count, seed):
+    return np.random.default_rng(seed).normal(size=(count, 8)).astype(np.float32)
+
+
+def small_index():
+    return FaceIndex(n_lists=2, n_probe=2, min_train_per_list=5)
+
+
+def test_search_returns_closest_faces_first():
+    index = small_index()
+    faces = random_faces(4, seed=0)
+    index.add(faces, [0, 10, 20, 30], "video", fps=10)
+
+    matches = index.search(faces[2], threshold=None, top_k=2)
+
+    assert matches[0]["frame_index"] == 20
+    assert matches[0]["timestamp"] == "00:02"
+    assert matches[0]["distance"] < matches[1]["distance"]
+
+
+def test_trains_once_enough_faces_and_again_when_size_doubles():
+    index = small_index()
+    index.add(random_faces(6, seed=0), range(6), "first", fps=10)
+    assert not index.is_trained
+
+    index.add(random_faces(6, seed=1), range(6), "second", fps=10)
+    assert index.is_trained and index.trained_size == 12
+
+    index.add(random_faces(6, seed=2), range(6), "third", fps=10)
+    assert index.generation == 1
+
+    index.add(random_faces(6, seed=3), range(6), "fourth", fps=10)
+    assert index.generation == 2 and index.trained_size == 24
+
+
+def test_save_load_round_trip(tmp_path):
+    index = small_index()
+    faces = random_faces(12, seed=0)
+    index.add(faces[:6], range(6), "first", fps=10)
+    index.add(faces[6:], range(6), "second", fps=10)
+    index.save(str(tmp_path))
+
+    loaded = FaceIndex.load(str(tmp_path))
+
+    assert len(loaded) == 12
+    assert loaded.contains("second")
+    assert isinstance(loaded.shards[0].embeddings, np.memmap)
+    assert loaded.search(faces[7], threshold=None, top_k=1) == index.search(
+        faces[7], threshold=None, top_k=1
+    )
+
+
+def test_save_writes_only_new_shards(tmp_path):
+    index = small_index()
+    index.add(random_faces(4, seed=0), range(4), "first", fps=10)
+    index.save(str(tmp_path))
+    first = os.path.join(tmp_path, "shards", index.videos[0]["shard"])
+    os.utime(os.path.join(first, "embeddings.npy"), (0, 0))
+
+    index = FaceIndex.open(str(tmp_path))
+    index.add(random_faces(4, seed=1), range(4), "second", fps=10)
+    index.save(str(tmp_path))
+
+    assert os.path.getmtime(os.path.join(first, "embeddings.npy")) == 0
+    assert len(os.listdir(tmp_path / "shards")) == 2
+
+
+def test_retraining_removes_stale_generations(tmp_path):
+    index = small_index()
+    for seed in range(2):
+        index.add(random_faces(6, seed=seed), range(6), f"video{seed}", fps=10)
+    index.save(str(tmp_path))
+
+    index = FaceIndex.load(str(tmp_path))
+    for seed in range(2, 4):
+        index.add(random_faces(6, seed=seed), range(6), f"video{seed}", fps=10)
+    index.save(str(tmp_path))
+
+    shard = os.path.join(tmp_path, "shards", index.videos[0]["shard"])
+    assert sorted(os.listdir(shard)) == ["embeddings.npy", "frames.npy", "lists-2.npy"]
+    assert [name for name in os.listdir(tmp_path) if name.startswith("centroids")] == [
+        "centroids-2.npy"
+    ]
+    assert len(FaceIndex.load(str(tmp_path))) == 24
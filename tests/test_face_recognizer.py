@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fh_face_recognizer import FaceRecognizer
+from fh_frame_extractor import FrameBatch
+from fh_tracker import FaceTracker
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def recognizer(monkeypatch):
+    """Recognizer whose detector finds one face in the same box everywhere."""
+    recognizer = FaceRecognizer(np.ones(128, dtype=np.float32))
+    recognizer.embedded_crops = 0
+
+    def detect(frame):
+        return [np.zeros((160, 160, 3), dtype=np.float32)], [(10, 10, 20, 20)]
+
+    def embed(crops):
+        recognizer.embedded_crops += len(crops)
+        return np.ones((len(crops), 128), dtype=np.float32)
+
+    monkeypatch.setattr(recognizer, "_detect_faces", detect)
+    monkeypatch.setattr(recognizer, "_embed_faces", embed)
+    return recognizer
+
+
+def represent(recognizer, frame_count, shot_starts=(), faceless=()):
+    batch = FrameBatch((FRAME, idx) for idx in range(frame_count))
+    batch.shot_starts = set(shot_starts)
+    faces = recognizer._represent_batch(
+        batch, FaceTracker(), faceless=set(faceless), new_shots=batch.shot_starts
+    )
+    return faces, recognizer.embedded_crops
+
+
+def test_tracked_face_reuses_its_embedding(recognizer):
+    faces, embedded = represent(recognizer, 3)
+    assert embedded == 1
+    assert len(faces.embeddings) == 3
+
+
+def test_tracks_end_at_shot_starts(recognizer):
+    _, embedded = represent(recognizer, 3, shot_starts={1, 2})
+    assert embedded == 3
+
+
+def test_faceless_frames_age_tracks(recognizer):
+    faces, embedded = represent(recognizer, 4, faceless={1, 2})
+    assert faces.frame_indices == [0, 3]
+    assert embedded == 2
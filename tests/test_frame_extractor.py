@@ -0,0 +1,141 @@
+import time
+
+import cv2
+import numpy as np
+
+from fh_batch_planner import BatchPlanner
+from fh_frame_extractor import FrameBufferPool, VideoFrameExtractor
+
+
+def open_extractor(video_path, **kwargs):
+    extractor = VideoFrameExtractor(video_path, **kwargs)
+    success, msg = extractor.open_video()
+    assert success, msg
+    return extractor
+
+
+def test_frame_offset_maps_file_frames_to_full_video(make_video):
+    path = make_video(frame_count=30)
+    extractor = open_extractor(path, frame_offset=100)
+    try:
+        assert extractor.total_frames == 130
+        assert extractor.known_frame_count == 130
+
+        extractor.frame_interval = 5
+        assert extractor._first_sampled_frame() == 100
+        extractor.start_frame = 112
+        assert extractor._first_sampled_frame() == 115
+        extractor.start_frame = 0
+
+        assert extractor._seek_to(110) == 110
+        ret, frame = extractor.video_capture.read()
+        assert ret
+        # Frame i of the file is filled with gray level i
+        assert abs(int(np.median(frame)) - 10) <= 2
+
+        extractor.video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        success, generator = extractor.process_video()
+        assert success, generator
+        samples = [
+            (frame_idx, int(np.median(frame)))
+            for batch in generator
+            for frame, frame_idx in batch
+        ]
+    finally:
+        extractor.release_video()
+
+    assert [frame_idx for frame_idx, _ in samples] == [100, 105, 110, 115, 120, 125]
+    for frame_idx, level in samples:
+        assert abs(level - (frame_idx - 100)) <= 2
+
+
+def test_end_frame_in_full_video_frames(make_video):
+    path = make_video(frame_count=30)
+    extractor = open_extractor(path, start_frame=104, end_frame=120, frame_offset=100)
+    extractor.frame_interval = 4
+    success, generator = extractor.process_video()
+    assert success, generator
+    try:
+        indices = [frame_idx for batch in generator for _, frame_idx in batch]
+    finally:
+        extractor.release_video()
+
+    assert indices == [104, 108, 112, 116]
+    assert extractor.total_processable_frames == 4
+
+
+def extract_shots(video_path):
+    """Representative frames and shot starts of a shot-detection pass."""
+    extractor = open_extractor(video_path)
+    extractor.frame_interval = 1
+    extractor.shot_detection = True
+    success, generator = extractor.process_video()
+    assert success, generator
+    representatives = []
+    shot_starts = set()
+    for batch in generator:
+        representatives += [idx for frame, idx in batch if frame is not None]
+        shot_starts |= batch.shot_starts
+    return representatives, shot_starts
+
+
+def test_shot_starts_mark_every_cut(make_video):
+    # Two hard cuts in a row: frames 10 and 11 each start a shot
+    levels = [0] * 10 + [200] + [60] * 9
+    representatives, shot_starts = extract_shots(
+        make_video(frame_count=len(levels), levels=levels)
+    )
+
+    assert representatives == [0, 10, 11]
+    assert shot_starts == {0, 10, 11}
+
+
+def test_long_shot_refresh_is_not_a_cut(make_video):
+    levels = [80] * 25
+    representatives, shot_starts = extract_shots(
+        make_video(frame_count=len(levels), levels=levels)
+    )
+
+    assert representatives == [0, 10, 20]
+    assert shot_starts == {0}
+
+
+def test_buffer_pool_reuses_slots_as_a_ring():
+    pool = FrameBufferPool((2, 2, 3), batch_size=2, slot_count=2)
+
+    first = [pool.next_frame((2, 2, 3)) for _ in range(2)]
+    assert pool.next_frame((2, 2, 3)) is None
+    pool.next_batch()
+    second = pool.next_frame((2, 2, 3))
+    pool.next_batch()
+    third = pool.next_frame((2, 2, 3))
+
+    assert not np.shares_memory(first[0], second)
+    assert np.shares_memory(first[0], third)
+    assert not np.shares_memory(first[0], first[1])
+
+
+def test_buffer_pool_rejects_other_frame_shapes():
+    pool = FrameBufferPool((2, 2, 3), batch_size=2, slot_count=2)
+
+    assert pool.next_frame((4, 4, 3)) is None
+    assert pool.slots == [None, None]
+
+
+def test_pipelined_batches_stay_intact_while_held(make_video):
+    path = make_video(frame_count=40)
+    extractor = open_extractor(path)
+    extractor.frame_interval = 2
+    extractor.batch_planner = BatchPlanner(max_batch=3)
+    success, generator = extractor.process_video(pipelined=True, queue_depth=1)
+    assert success, generator
+
+    indices = []
+    for batch in generator:
+        # Let the decoding thread run as far ahead as the queue allows
+        time.sleep(0.05)
+        for frame, frame_idx in batch:
+            assert abs(int(np.median(frame)) - frame_idx) <= 2
+            indices.append(frame_idx)
+
+    assert indices == list(range(0, 40, 2))
@@ -0,0 +1,70 @@
+import copy
+import shutil
+
+from fh_core import FaceHuntCore
+from fh_download_cache import DownloadCache
+from fh_downloader import VideoDownloader
+from fh_frame_extractor import VideoFrameExtractor
+from fh_metadata import MetadataCache, video_properties
+
+URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+
+class FakeYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL, counting extraction round trips."""
+
+    extract_calls = 0
+    source_video = None
+    info = {
+        "id": "abcdefghijk",
+        "title": "Test video",
+        "duration": 3,
+        "formats": [{"format_id": "18", "ext": "avi", "fps": 10}],
+    }
+
+    def __init__(self, options):
+        self.options = options
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=False):
+        FakeYoutubeDL.extract_calls += 1
+        return copy.deepcopy(self.info)
+
+    def process_ie_result(self, info, download=False):
+        info = dict(info, format_id="18", ext="avi", fps=10)
+        if download:
+            shutil.copy(self.source_video, self.options["outtmpl"] % {"ext": "avi"})
+        return info
+
+
+def test_video_info_is_extracted_once(make_video, tmp_path, monkeypatch):
+    monkeypatch.setattr(FakeYoutubeDL, "extract_calls", 0)
+    monkeypatch.setattr(FakeYoutubeDL, "source_video", make_video(frame_count=30))
+    metadata = MetadataCache(ydl_factory=FakeYoutubeDL)
+    core = FaceHuntCore(metadata=metadata)
+
+    success, source_type, message = core.validate_video_source(URL)
+    assert (success, source_type) == (True, "youtube"), message
+
+    downloader = VideoDownloader(
+        URL, cache=DownloadCache(str(tmp_path / "videos")), metadata=metadata
+    )
+    video_path = downloader.download()
+    try:
+        assert video_path is not None
+        extractor = VideoFrameExtractor(
+            video_path, metadata=video_properties(downloader.info)
+        )
+        success, msg = extractor.open_video()
+        assert success, msg
+        assert extractor.fps == 10
+        extractor.release_video()
+    finally:
+        downloader.release()
+
+    assert FakeYoutubeDL.extract_calls == 1
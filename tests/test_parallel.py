@@ -0,0 +1,44 @@
+import pytest
+
+from fh_parallel import _merge_matches, split_segments
+
+
+@pytest.mark.parametrize(
+    "total_frames, frame_interval, segment_count, start_frame",
+    [(100, 10, 4, 0), (101, 7, 3, 0), (95, 10, 4, 23), (30, 10, 8, 0)],
+)
+def test_segments_yield_the_frames_of_one_pass(
+    total_frames, frame_interval, segment_count, start_frame
+):
+    segments = split_segments(total_frames, frame_interval, segment_count, start_frame)
+
+    # Each segment samples its own grid-aligned frames, like a worker does
+    sampled = [
+        frame_idx
+        for start, end in segments
+        for frame_idx in range(
+            -(-start // frame_interval) * frame_interval, end, frame_interval
+        )
+    ]
+    first = -(-start_frame // frame_interval) * frame_interval
+    assert sampled == list(range(first, total_frames, frame_interval))
+    assert len(segments) <= segment_count
+
+
+def test_segments_hold_at_least_one_sample():
+    assert split_segments(30, 10, 8) == [(0, 10), (10, 20), (20, 30)]
+
+
+def test_no_segments_for_an_empty_range():
+    assert split_segments(20, 10, 4, start_frame=25) == []
+
+
+def test_merge_matches_orders_by_frame_or_distance():
+    matches = [
+        {"frame_index": 20, "distance": 0.1},
+        {"frame_index": 10, "distance": 0.3},
+        {"frame_index": 30, "distance": 0.2},
+    ]
+
+    assert [m["frame_index"] for m in _merge_matches(matches)] == [10, 20, 30]
+    assert [m["frame_index"] for m in _merge_matches(matches, top_k=2)] == [20, 30]
@@ -0,0 +1,100 @@
+import functools
+import http.server
+import io
+import os
+import tempfile
+import threading
+
+import pytest
+
+from fh_frame_extractor import VideoFrameExtractor
+from fh_stream import SpooledUpload, UploadStream, is_pipe, is_stream_url
+
+pytestmark = pytest.mark.skipif(
+    not UploadStream.supported(), reason="named pipes are not available"
+)
+
+
+def extract_indices(video_path, frame_interval=1):
+    """Frame indices yielded by a sequential pass over a video."""
+    extractor = VideoFrameExtractor(video_path)
+    success, msg = extractor.open_video()
+    assert success, msg
+    extractor.frame_interval = frame_interval
+    success, generator = extractor.process_video(pipelined=True)
+    assert success, generator
+    try:
+        return [frame_idx for batch in generator for _, frame_idx in batch]
+    finally:
+        extractor.release_video()
+
+
+def test_upload_stream_feeds_extractor(make_video):
+    path = make_video(frame_count=30)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    stream = UploadStream(io.BytesIO(data), chunk_size=4096)
+    try:
+        assert is_pipe(stream.path)
+        assert extract_indices(stream.path, frame_interval=5) == [0, 5, 10, 15, 20, 25]
+    finally:
+        stream.close()
+
+    assert stream.error is None
+    assert stream.bytes_fed == len(data)
+    assert not os.path.exists(stream.temp_dir)
+
+
+def test_extracts_from_http_url(make_video):
+    path = make_video(frame_count=20)
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler, directory=os.path.dirname(path)
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/{os.path.basename(path)}"
+        assert is_stream_url(url)
+        assert not is_stream_url(path)
+        assert extract_indices(url, frame_interval=4) == [0, 4, 8, 12, 16]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_close_unblocks_unread_writer():
+    stream = UploadStream(io.BytesIO(b"x" * (4 * 1024 * 1024)), chunk_size=65536)
+
+    closer = threading.Thread(target=stream.close, daemon=True)
+    closer.start()
+    closer.join(timeout=10)
+
+    assert not closer.is_alive()
+    assert not stream._worker.is_alive()
+    assert stream.file_obj.closed
+    assert not os.path.exists(stream.temp_dir)
+
+
+@pytest.mark.skipif(not SpooledUpload.supported(), reason="no /proc/<pid>/fd")
+def test_spooled_upload_is_a_seekable_file(make_video):
+    path = make_video(frame_count=30)
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    with open(path, "rb") as f:
+        spooled.write(f.read())
+
+    upload = SpooledUpload(spooled, ".avi")
+    # The framework closes its copy once the request ends
+    spooled.close()
+    try:
+        assert upload.path.endswith(".avi")
+        assert os.path.isfile(upload.path)
+        assert not is_pipe(upload.path)
+        assert extract_indices(upload.path, frame_interval=10) == [0, 10, 20]
+        # Readable again from the start, e.g. by a second pass
+        assert extract_indices(upload.path, frame_interval=10) == [0, 10, 20]
+    finally:
+        upload.close()
+
+    assert not os.path.exists(upload.temp_dir)
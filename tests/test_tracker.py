@@ -0,0 +1,72 @@
+from fh_tracker import FaceTracker, build_appearances, format_timestamp
+
+
+def test_overlapping_face_reuses_the_track_embedding():
+    tracker = FaceTracker()
+
+    [(track, needs_embedding)] = tracker.update([(10, 10, 20, 20)])
+    assert needs_embedding
+    [(same_track, needs_embedding)] = tracker.update([(11, 10, 20, 20)])
+
+    assert same_track is track
+    assert not needs_embedding
+    assert (tracker.embedded, tracker.reused) == (1, 1)
+
+
+def test_moved_face_starts_a_new_track():
+    tracker = FaceTracker()
+    [(track, _)] = tracker.update([(10, 10, 20, 20)])
+
+    [(other, needs_embedding)] = tracker.update([(100, 100, 20, 20)])
+
+    assert other is not track
+    assert needs_embedding
+
+
+def test_embedding_refreshed_after_max_age():
+    tracker = FaceTracker(max_age=2)
+    box = (10, 10, 20, 20)
+
+    flags = [tracker.update([box])[0][1] for _ in range(5)]
+
+    assert flags == [True, False, False, True, False]
+
+
+def test_track_survives_max_missed_samples():
+    tracker = FaceTracker(max_missed=1)
+    [(track, _)] = tracker.update([(10, 10, 20, 20)])
+
+    tracker.update([])
+    [(kept, _)] = tracker.update([(10, 10, 20, 20)])
+    tracker.update([])
+    tracker.update([])
+    [(new, _)] = tracker.update([(10, 10, 20, 20)])
+
+    assert kept is track
+    assert new is not track
+
+
+def test_reset_forgets_tracks():
+    tracker = FaceTracker()
+    tracker.update([(10, 10, 20, 20)])
+
+    tracker.reset()
+
+    assert tracker.update([(10, 10, 20, 20)])[0][1]
+
+
+def test_build_appearances_merges_close_samples():
+    matches = [{"frame_index": frame_idx} for frame_idx in (0, 10, 20, 100, 110)]
+
+    appearances = build_appearances(matches, fps=10, max_gap=20)
+
+    assert [(a["start_frame"], a["end_frame"]) for a in appearances] == [
+        (0, 20),
+        (100, 110),
+    ]
+    assert appearances[1]["start"] == "00:10"
+
+
+def test_format_timestamp():
+    assert format_timestamp(0, 25) == "00:00"
+    assert format_timestamp(3725, 25) == "02:29"